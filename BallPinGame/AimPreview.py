@@ -0,0 +1,124 @@
+import math
+import random
+import sys
+import time
+from collections import OrderedDict
+
+from PinPhysics import Ball, Pin, FixedTimestep, LANE_WIDTH, LANE_HEIGHT, setup_pins
+from EventPhysics import EventSimulation
+
+class AimPreview:
+    """Predicts the path of a pending throw and the pins it will knock down
+
+    Predictions ignore the random deflection after a pin hit, so they show the
+    line the ball is thrown along, but otherwise play the games' rules:
+    knocked pins fly off and topple the pins they hit, and the ball is tested
+    against its whole path, stepped at the game's dt. Each one runs the
+    event-driven simulation with a time budget per call and is cached on
+    (power, angle, ball position, standing pins). A throw that outlasts the
+    budget, such as a slow chain of falling pins, is resumed on the next call
+    with the same aim, so a steady aim settles on the game's exact outcome
+    within a few frames and holding a key only simulates when the aim changes.
+    """
+
+    def __init__(self, budget=0.0005, cache_size=256, dt=1):
+        self.budget = budget  # Seconds allowed per call
+        self.dt = dt  # Simulation step in 60 FPS frames; the games pass theirs
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def predict(self, ball, pins):
+        """Return (path points, indexes of pins predicted to fall) as far as simulated yet"""
+        key = (ball.power, round(ball.angle, 9), ball.x, ball.y, tuple(pin.is_hit for pin in pins))
+        prediction = self._cache.get(key)
+        if prediction is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            if isinstance(prediction, tuple):
+                return prediction
+        else:
+            self.misses += 1
+            prediction = _Throw(ball, pins, self.dt)
+            self._cache[key] = prediction
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        result = prediction.run(time.perf_counter() + self.budget)
+        if not prediction.sim.busy() and key in self._cache:
+            self._cache[key] = result  # Finished, so keep only the answer
+        return result
+
+class _Throw:
+    """A predicted throw, simulated a budget at a time"""
+
+    def __init__(self, ball, pins, dt):
+        self.dt = dt
+        self.standing = [not pin.is_hit for pin in pins]
+
+        # Work on copies so the real ball and pins are untouched
+        ghost = Ball(ball.x, ball.y, ball.radius, ball.width, ball.height)
+        ghost.power = ball.power
+        ghost.angle = ball.angle
+        ghost_pins = []
+        for pin in pins:
+            ghost_pin = Pin(pin.x, pin.y, pin.radius)
+            ghost_pin.is_hit = pin.is_hit
+            ghost_pins.append(ghost_pin)
+
+        # The simulation drops pins that fly off the lane, so keep the rack's order
+        self.rack = list(ghost_pins)
+        self.sim = EventSimulation(ghost, ghost_pins, deflect=False, pin_force=5, pin_collisions=True, swept=True)
+        ghost.throw()
+        self.path = [(ghost.x, ghost.y)]
+
+    def run(self, deadline):
+        """Simulate until the throw ends or the deadline passes; returns (path, falling)"""
+        sim, ghost, ghost_pins, dt = self.sim, self.sim.ball, self.sim.pins, self.dt
+        path = self.path
+        while sim.busy() and time.perf_counter() < deadline:
+            sim.advance((sim.next_event(dt) - 1) * dt)
+            sim.step(dt)
+            if ghost.x != path[-1][0] or ghost.y != path[-1][1]:
+                path.append((ghost.x, ghost.y))
+
+            # Pins falling below every standing pin can topple nothing more
+            lowest = max((pin.y for pin in ghost_pins if not pin.is_hit), default=-math.inf)
+            ghost_pins[:] = [pin for pin in ghost_pins
+                             if not pin.is_hit or pin.velocity_y < 0 or pin.y <= lowest + 2 * pin.radius]
+
+        falling = tuple(index for index, (standing, ghost_pin) in enumerate(zip(self.standing, self.rack))
+                        if standing and ghost_pin.is_hit)
+        return list(path), falling
+
+def benchmark(predictions=2000, seed=0):
+    """Time uncached predictions against the per-frame budget, one call per frame until each settles"""
+    rng = random.Random(seed)
+    preview = AimPreview(cache_size=1, dt=FixedTimestep(rate=240).dt)
+    pins = setup_pins()
+    preview.predict(Ball(LANE_WIDTH // 2, LANE_HEIGHT - 50), pins)  # Warm up
+    timings = []
+    calls = []
+    start = time.perf_counter()
+    for _ in range(predictions):
+        ball = Ball(LANE_WIDTH // 2, LANE_HEIGHT - 50)
+        ball.power = rng.randint(0, 50)
+        ball.angle = rng.uniform(-math.pi, 0)
+        frames = 0
+        while frames == 0 or not isinstance(next(iter(preview._cache.values())), tuple):
+            began = time.perf_counter()
+            preview.predict(ball, pins)
+            timings.append(time.perf_counter() - began)
+            frames += 1
+        calls.append(frames)
+    elapsed = time.perf_counter() - start
+    calls.sort()
+    timings.sort()
+    print(f"Mean {elapsed / len(timings) * 1e6:.0f} us, 99th percentile {timings[len(timings) * 99 // 100] * 1e6:.0f} us, "
+          f"worst {timings[-1] * 1e6:.0f} us per call")
+    print(f"Frames until the prediction settles: median {calls[len(calls) // 2]}, "
+          f"99th percentile {calls[len(calls) * 99 // 100]}, worst {calls[-1]}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
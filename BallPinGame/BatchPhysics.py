@@ -0,0 +1,363 @@
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from PinPhysics import (LANE_WIDTH, LANE_HEIGHT, FRICTION, STOP_SPEED, BOUNCE, GRAVITY,
+                        Ball, LaneSimulation, setup_pins)
+
+SETTLE_INTERVAL = 4  # Steps between checks for settled balls and pins
+
+class BatchLaneSimulation:
+    """Steps many independent lanes at once, one row of NumPy arrays per lane
+
+    Every lane has a ball and a rack of pins and follows the rules of
+    LaneSimulation with pin_force, pin_collisions and swept=True: knocked
+    pins fly off and fall away, topple the pins they touch, and the ball is
+    tested against its whole path each step. Pins that leave the screen are
+    dropped from their lane, just as LaneSimulation drops them from its list.
+
+    settle: for headless searches that only need the pins knocked down. A
+        thrown ball jumps straight to the step before it could first touch a
+        pin or a wall. The ball stops being tracked once its remaining straight
+        roll cannot reach either, and its falling pins once they are below
+        every standing pin and still falling. Lanes then finish much sooner
+        and no longer share a clock. Knocked-down counts differ from a full
+        run only when two falling pins collide after they have passed the rack.
+    """
+
+    def __init__(self, lanes, deflect=True, pin_force=5, rng=None, pin_collisions=True, settle=False,
+                 ball_radius=20, pin_radius=15, width=LANE_WIDTH, height=LANE_HEIGHT):
+        self.lanes = lanes
+        self.deflect = deflect
+        self.pin_force = pin_force
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.pin_collisions = pin_collisions
+        self.settle = settle
+        self.ball_radius = ball_radius
+        self.pin_radius = pin_radius
+        self.width = width
+        self.height = height
+
+        rack = setup_pins(width=width)
+        self.rack_x = np.array([pin.x for pin in rack], dtype=float)
+        self.rack_y = np.array([pin.y for pin in rack], dtype=float)
+
+        self.ball_x = np.zeros(lanes)
+        self.ball_y = np.zeros(lanes)
+        self.prev_x = np.zeros(lanes)
+        self.prev_y = np.zeros(lanes)
+        self.velocity_x = np.zeros(lanes)
+        self.velocity_y = np.zeros(lanes)
+        self.moving = np.zeros(lanes, dtype=bool)
+
+        shape = (lanes, len(rack))
+        self.pin_x = np.zeros(shape)
+        self.pin_y = np.zeros(shape)
+        self.pin_velocity_x = np.zeros(shape)
+        self.pin_velocity_y = np.zeros(shape)
+        self.is_hit = np.zeros(shape, dtype=bool)
+        self.present = np.zeros(shape, dtype=bool)  # Still on the lane
+        self.knocked_down = np.zeros(lanes, dtype=np.int64)
+        self.throw_finished = np.zeros(lanes, dtype=bool)
+        self.steps = 0
+
+        self.reset_ball()
+        self.reset_pins()
+
+    def reset_ball(self, lanes=slice(None)):
+        self.ball_x[lanes] = self.width // 2
+        self.ball_y[lanes] = self.height - 50
+        self.prev_x[lanes] = self.ball_x[lanes]
+        self.prev_y[lanes] = self.ball_y[lanes]
+        self.velocity_x[lanes] = 0
+        self.velocity_y[lanes] = 0
+        self.moving[lanes] = False
+
+    def reset_pins(self, lanes=slice(None), standing=None):
+        """Set up a full rack, or only the pins where standing is True"""
+        self.pin_x[lanes] = self.rack_x
+        self.pin_y[lanes] = self.rack_y
+        self.pin_velocity_x[lanes] = 0
+        self.pin_velocity_y[lanes] = 0
+        self.is_hit[lanes] = False
+        self.present[lanes] = True if standing is None else standing
+        self.knocked_down[lanes] = 0
+
+    def throw(self, power, angle, lanes=slice(None)):
+        """Throw the resting balls of lanes; power and angle are scalars or per lane"""
+        selected = np.zeros(self.lanes, dtype=bool)
+        selected[lanes] = True
+        lanes = selected & ~self.moving
+        power = np.broadcast_to(np.asarray(power, dtype=float), self.lanes)
+        angle = np.broadcast_to(np.asarray(angle, dtype=float), self.lanes)
+        self.velocity_x[lanes] = np.cos(angle[lanes]) * (power[lanes] / 5)
+        self.velocity_y[lanes] = np.sin(angle[lanes]) * (power[lanes] / 5)
+        self.moving |= lanes
+        if self.settle:
+            self._approach(np.nonzero(lanes)[0])
+
+    def busy(self):
+        """Per lane: True while the ball rolls or, with pin collisions, pins are still flying"""
+        if not self.pin_collisions:
+            return self.moving.copy()
+        return self.moving | (self.is_hit & self.present).any(axis=1)
+
+    def step(self, dt=1):
+        """Advance every lane dt frames and return the pins knocked down in each"""
+        was_moving = self.moving.copy()
+        was_busy = self.busy()
+        self._move_balls(dt)
+        hits = self._ball_hits(was_moving)
+        self._fall(dt)
+        if self.pin_collisions:
+            hits += self._resolve_pin_collisions()
+        self.steps += 1
+        if self.settle and self.steps % SETTLE_INTERVAL == 0:
+            self._settle()
+
+        self.knocked_down += hits
+        self.throw_finished = was_busy & ~self.busy()
+        return hits
+
+    def run(self, dt=1, max_steps=100000):
+        """Step until no lane is busy; returns the knocked-down count of every lane"""
+        for _ in range(max_steps):
+            if not self.busy().any():
+                break
+            self.step(dt)
+        return self.knocked_down
+
+    def _move_balls(self, dt):
+        np.copyto(self.prev_x, self.ball_x)
+        np.copyto(self.prev_y, self.ball_y)
+
+        # Resting balls have no velocity, so this only moves the rolling ones
+        decay = FRICTION ** dt
+        travelled = (1 - decay) / (1 - FRICTION)
+        self.ball_x += self.velocity_x * travelled
+        self.ball_y += self.velocity_y * travelled
+        self.velocity_x *= decay
+        self.velocity_y *= decay
+
+        stopped = self.moving & (np.abs(self.velocity_x) < STOP_SPEED) & (np.abs(self.velocity_y) < STOP_SPEED)
+        self.velocity_x[stopped] = 0
+        self.velocity_y[stopped] = 0
+        self.moving &= ~stopped
+
+        radius = self.ball_radius
+        for position, velocity, limit in ((self.ball_x, self.velocity_x, self.width - radius),
+                                          (self.ball_y, self.velocity_y, self.height - radius)):
+            low = position < radius
+            high = position > limit
+            position[low] = radius
+            position[high] = limit
+            velocity[low | high] *= -BOUNCE
+
+    def _ball_hits(self, was_moving):
+        """Knock down the standing pins each rolling ball passed through"""
+        rolling = np.nonzero(was_moving)[0]
+        rows, pins = np.nonzero(self._standing_in_reach(rolling, self.prev_x[rolling], self.prev_y[rolling],
+                                                        self.ball_x[rolling], self.ball_y[rolling]))
+        if not len(rows):
+            return np.zeros(self.lanes, dtype=np.int64)
+        lanes = rolling[rows]
+
+        self.is_hit[lanes, pins] = True
+        angle = np.arctan2(self.pin_y[lanes, pins] - self.ball_y[lanes], self.pin_x[lanes, pins] - self.ball_x[lanes])
+        self.pin_velocity_x[lanes, pins] = np.cos(angle) * self.pin_force
+        self.pin_velocity_y[lanes, pins] = np.sin(angle) * self.pin_force
+
+        if self.deflect:
+            # Random kick to the ball for every pin it hits
+            angle = self.rng.uniform(0, 2 * math.pi, len(lanes))
+            speed = self.rng.uniform(0.5, 2, len(lanes))
+            np.add.at(self.velocity_x, lanes, np.cos(angle) * speed)
+            np.add.at(self.velocity_y, lanes, np.sin(angle) * speed)
+
+            # A ball that stopped this step keeps no velocity, as throw() sets it afresh
+            self.velocity_x[~self.moving] = 0
+            self.velocity_y[~self.moving] = 0
+        return np.bincount(lanes, minlength=self.lanes)
+
+    def _fall(self, dt):
+        falling = self.is_hit & self.present
+        if not falling.any():
+            return
+        self.pin_x += self.pin_velocity_x * dt * falling
+        self.pin_y += (self.pin_velocity_y * dt + GRAVITY * dt * (dt - 1) / 2) * falling
+        self.pin_velocity_y += GRAVITY * dt * falling
+        self.present &= ~(falling & (self.pin_y > self.height + self.pin_radius))
+
+    def _resolve_pin_collisions(self):
+        """Batched LaneSimulation.resolve_pin_collisions over every falling pin"""
+        toppled = np.zeros(self.lanes, dtype=np.int64)
+        falling = self.is_hit & self.present
+        lanes, pins = np.nonzero(falling)
+        if not len(lanes):
+            return toppled
+
+        # Row k compares falling pin k with every pin of its lane. Falling
+        # pairs are taken once, the earlier pin first, as LaneSimulation does
+        standing = self.present & ~self.is_hit
+        dx = self.pin_x[lanes] - self.pin_x[lanes, pins][:, None]
+        dy = self.pin_y[lanes] - self.pin_y[lanes, pins][:, None]
+        distance_squared = dx * dx + dy * dy
+        reach = 2 * self.pin_radius
+        later = np.arange(self.pin_x.shape[1]) > pins[:, None]
+        rows, others = np.nonzero((standing[lanes] | (falling[lanes] & later)) &
+                                  (distance_squared < reach * reach) & (distance_squared > 0))
+        if not len(rows):
+            return toppled
+
+        # Impulses from the velocities at the start of the pass
+        lanes = lanes[rows]
+        pins = pins[rows]
+        distance = np.sqrt(distance_squared[rows, others])
+        normal_x = dx[rows, others] / distance
+        normal_y = dy[rows, others] / distance
+        closing = ((self.pin_velocity_x[lanes, pins] - self.pin_velocity_x[lanes, others]) * normal_x +
+                   (self.pin_velocity_y[lanes, pins] - self.pin_velocity_y[lanes, others]) * normal_y)
+        closing_in = closing > 0
+        lanes, pins, others = lanes[closing_in], pins[closing_in], others[closing_in]
+        impulse_x = closing[closing_in] * normal_x[closing_in]
+        impulse_y = closing[closing_in] * normal_y[closing_in]
+        np.subtract.at(self.pin_velocity_x, (lanes, pins), impulse_x)
+        np.subtract.at(self.pin_velocity_y, (lanes, pins), impulse_y)
+        np.add.at(self.pin_velocity_x, (lanes, others), impulse_x)
+        np.add.at(self.pin_velocity_y, (lanes, others), impulse_y)
+
+        newly_hit = np.zeros_like(standing)
+        newly_hit[lanes, others] = True
+        newly_hit &= standing
+        self.is_hit |= newly_hit
+        return newly_hit.sum(axis=1)
+
+    def _approach(self, lanes):
+        """Roll fresh throws forward to a frame short of their first contact"""
+        x = self.ball_x[lanes]
+        y = self.ball_y[lanes]
+        velocity_x = self.velocity_x[lanes]
+        velocity_y = self.velocity_y[lanes]
+        speed = np.hypot(velocity_x, velocity_y)
+        rolling = speed > 0
+        direction_x = np.where(rolling, velocity_x / np.where(rolling, speed, 1), 0)
+        direction_y = np.where(rolling, velocity_y / np.where(rolling, speed, 1), 0)
+
+        # Distance along the roll to the first standing pin within reach
+        reach = self.pin_radius + self.ball_radius
+        offset_x = self.pin_x[lanes] - x[:, None]
+        offset_y = self.pin_y[lanes] - y[:, None]
+        along = offset_x * direction_x[:, None] + offset_y * direction_y[:, None]
+        miss_squared = offset_x * offset_x + offset_y * offset_y - along * along
+        touching = self.present[lanes] & ~self.is_hit[lanes] & (miss_squared < reach * reach) & (along > 0)
+        to_pin = np.where(touching, along - np.sqrt(np.maximum(reach * reach - miss_squared, 0)), np.inf).min(axis=1)
+
+        # ... and to the first wall
+        radius = self.ball_radius
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_wall = np.minimum(
+                np.where(direction_x > 0, (self.width - radius - x) / direction_x,
+                         np.where(direction_x < 0, (radius - x) / direction_x, np.inf)),
+                np.where(direction_y > 0, (self.height - radius - y) / direction_y,
+                         np.where(direction_y < 0, (radius - y) / direction_y, np.inf)))
+            to_event = np.minimum(to_pin, to_wall)
+
+            # Frames until the ball reaches the event or slows below STOP_SPEED
+            remaining = 1 - to_event * (1 - FRICTION) / np.where(rolling, speed, 1)
+            frames_to_event = np.where(remaining > 0, np.log(np.maximum(remaining, 1e-300)) / math.log(FRICTION), np.inf)
+            fastest = np.maximum(np.abs(velocity_x), np.abs(velocity_y))
+            frames_to_stop = np.log(STOP_SPEED / np.where(rolling, fastest, 1)) / math.log(FRICTION)
+
+        # A roll that stops before touching anything changes nothing
+        idle = rolling & (frames_to_event > frames_to_stop)
+        self.moving[lanes[idle]] = False
+        self.velocity_x[lanes[idle]] = 0
+        self.velocity_y[lanes[idle]] = 0
+
+        frames = np.floor(np.minimum(frames_to_event, frames_to_stop)) - 1
+        jump = rolling & ~idle & (frames > 0)
+        lanes = lanes[jump]
+        frames = frames[jump]
+        decay = FRICTION ** frames
+        travelled = (1 - decay) / (1 - FRICTION)
+        self.ball_x[lanes] += self.velocity_x[lanes] * travelled
+        self.ball_y[lanes] += self.velocity_y[lanes] * travelled
+        self.prev_x[lanes] = self.ball_x[lanes]
+        self.prev_y[lanes] = self.ball_y[lanes]
+        self.velocity_x[lanes] *= decay
+        self.velocity_y[lanes] *= decay
+
+    def _standing_in_reach(self, lanes, start_x, start_y, end_x, end_y):
+        """Which standing pins of lanes the ball touches rolling from start to end"""
+        path_x = (end_x - start_x)[:, None]
+        path_y = (end_y - start_y)[:, None]
+        offset_x = self.pin_x[lanes] - start_x[:, None]
+        offset_y = self.pin_y[lanes] - start_y[:, None]
+        length_squared = path_x * path_x + path_y * path_y
+        along = np.clip((offset_x * path_x + offset_y * path_y) / np.where(length_squared > 0, length_squared, 1), 0, 1)
+        dx = offset_x - along * path_x
+        dy = offset_y - along * path_y
+        reach = self.pin_radius + self.ball_radius
+        return self.present[lanes] & ~self.is_hit[lanes] & (dx * dx + dy * dy < reach * reach)
+
+    def _settle(self):
+        standing = self.present & ~self.is_hit
+
+        # Balls: the rest of a roll is at most velocity / (1 - FRICTION) in a straight line
+        rolling = np.nonzero(self.moving)[0]
+        if len(rolling):
+            end_x = self.ball_x[rolling] + self.velocity_x[rolling] / (1 - FRICTION)
+            end_y = self.ball_y[rolling] + self.velocity_y[rolling] / (1 - FRICTION)
+            radius = self.ball_radius
+            inside = ((np.minimum(end_x, self.ball_x[rolling]) >= radius) &
+                      (np.maximum(end_x, self.ball_x[rolling]) <= self.width - radius) &
+                      (np.minimum(end_y, self.ball_y[rolling]) >= radius) &
+                      (np.maximum(end_y, self.ball_y[rolling]) <= self.height - radius))
+
+            clear = ~self._standing_in_reach(rolling, self.ball_x[rolling], self.ball_y[rolling],
+                                             end_x, end_y).any(axis=1)
+
+            done = rolling[inside & clear]
+            self.moving[done] = False
+            self.velocity_x[done] = 0
+            self.velocity_y[done] = 0
+
+        # Pins: past the lowest standing pin and still falling, gravity keeps them away
+        lowest = np.where(standing, self.pin_y, -np.inf).max(axis=1)
+        gone = (self.is_hit & self.present & (self.pin_velocity_y >= 0) &
+                (self.pin_y > lowest[:, None] + 2 * self.pin_radius))
+        self.present &= ~gone
+
+def compare(throws=500, seed=0, dt=1):
+    """Check lanes without deflection against LaneSimulation, throw for throw"""
+    rng = random.Random(seed)
+    aims = [(rng.randint(10, 50), -math.pi / 2 + rng.randint(-10, 10) * 0.05) for _ in range(throws)]
+
+    start = time.perf_counter()
+    expected = []
+    for power, angle in aims:
+        sim = LaneSimulation(Ball(LANE_WIDTH // 2, LANE_HEIGHT - 50), setup_pins(), deflect=False,
+                             pin_force=5, pin_collisions=True, swept=True)
+        sim.ball.power, sim.ball.angle = power, angle
+        sim.ball.throw()
+        while sim.busy():
+            sim.step(dt)
+        expected.append(sim.knocked_down)
+    scalar = time.perf_counter() - start
+
+    results = []
+    for settle in (False, True):
+        start = time.perf_counter()
+        batch = BatchLaneSimulation(throws, deflect=False, settle=settle)
+        batch.throw([power for power, _ in aims], [angle for _, angle in aims])
+        knocked_down = batch.run(dt)
+        results.append((time.perf_counter() - start, int(np.count_nonzero(knocked_down != expected))))
+    print(f"{throws} throws at dt={dt}: LaneSimulation {scalar * 1000:.0f} ms, "
+          f"batch {results[0][0] * 1000:.0f} ms ({results[0][1]} mismatches), "
+          f"settled batch {results[1][0] * 1000:.0f} ms ({results[1][1]} mismatches)")
+
+if __name__ == "__main__":
+    compare(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,108 @@
+import random
+import sys
+import time
+
+import numpy as np
+
+from BowlingScore import ScoreKeeper
+
+MAX_THROWS = 21
+
+def score_games(throws, total_frames=10):
+    """Score a (games x throws) array of zero-padded games in one pass
+
+    Returns the per-frame scores and the total score of every game.
+    """
+    throws = np.asarray(throws)
+    games, width = throws.shape
+
+    # Two extra columns so bonus lookups past the last throw read 0
+    padded = np.zeros((games, width + 2), dtype=np.int16)
+    padded[:, :width] = throws
+
+    # Flat index of each game's next frame; cheaper to gather than (row, column) pairs
+    flat = padded.ravel()
+    index = np.arange(0, games * (width + 2), width + 2)
+    frame_scores = np.empty((games, total_frames), dtype=np.int16)
+
+    for frame in range(total_frames):
+        first = flat[index]
+        second = flat[index + 1]
+        third = flat[index + 2]
+
+        # Strikes and spares both score the frame plus the following throw(s)
+        strike = first == 10
+        bonus = strike | (first + second == 10)
+        frame_scores[:, frame] = first + second + third * bonus
+
+        index += 2 - strike
+
+    return frame_scores, frame_scores.sum(axis=1, dtype=np.int32)
+
+def random_game(rng=random):
+    """Play one game of random throws and return the list of pins knocked down"""
+    keeper = ScoreKeeper()
+    throws = []
+    while not keeper.game_over:
+        knocked_down = rng.randint(0, keeper.pins)
+        keeper.add_throw(knocked_down)
+        throws.append(knocked_down)
+    return throws
+
+def pack_games(games):
+    """Pack lists of throws into a zero-padded (games x 21) array"""
+    packed = np.zeros((len(games), MAX_THROWS), dtype=np.uint8)
+    for row, throws in enumerate(games):
+        packed[row, :len(throws)] = throws
+    return packed
+
+def score_game_scalar(throws):
+    """Score a single game with the incremental ScoreKeeper"""
+    keeper = ScoreKeeper()
+    for knocked_down in throws:
+        keeper.add_throw(knocked_down)
+    return keeper.frame_scores
+
+def cross_check(games):
+    """Return the number of games where batch and scalar scores differ"""
+    frame_scores, totals = score_games(pack_games(games))
+    mismatches = 0
+    for row, throws in enumerate(games):
+        expected = score_game_scalar(throws)
+        if list(frame_scores[row]) != expected or totals[row] != sum(expected):
+            mismatches += 1
+    return mismatches
+
+def benchmark(games=1_000_000, seed=0):
+    """Compare games/second of the batch scorer against the scalar scorers"""
+    rng = random.Random(seed)
+    sample = [random_game(rng) for _ in range(10_000)]
+    print(f"Cross-check on {len(sample)} games: {cross_check(sample)} mismatches")
+
+    # Scalar scorers on the sample
+    from BowlingGame import BowlingGame
+    start = time.perf_counter()
+    for throws in sample:
+        game = BowlingGame()
+        for knocked_down in throws:
+            game.score_keeper.add_throw(knocked_down)
+        game.throws = throws
+        game.calculate_total_score()
+    elapsed = time.perf_counter() - start
+    print(f"BowlingGame.calculate_total_score: {len(sample) / elapsed:,.0f} games/s")
+
+    start = time.perf_counter()
+    for throws in sample:
+        score_game_scalar(throws)
+    elapsed = time.perf_counter() - start
+    print(f"ScoreKeeper: {len(sample) / elapsed:,.0f} games/s")
+
+    # Batch scorer on the sample repeated up to the requested size
+    packed = np.resize(pack_games(sample), (games, MAX_THROWS))
+    start = time.perf_counter()
+    score_games(packed)
+    elapsed = time.perf_counter() - start
+    print(f"score_games: {games / elapsed:,.0f} games/s")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,167 @@
+import math
+import sys
+import time
+
+import numpy as np
+
+from BatchPhysics import BatchLaneSimulation
+from PinPhysics import FixedTimestep, setup_pins
+
+MAX_POWER = 50
+ANGLE_STEP = 0.05  # One arrow-key press
+STRAIGHT = -math.pi / 2
+
+def standing_mask(pins):
+    """Which pins of a full rack are still standing, from a lane's pin list"""
+    standing = {(pin.x, pin.y) for pin in pins if not pin.is_hit}
+    return np.array([(pin.x, pin.y) in standing for pin in setup_pins()])
+
+class BowlingAI:
+    """Computer player that picks each throw by simulating candidates in bulk
+
+    choose() looks for the power and angle that knock down the most of the
+    standing pins on average under the random deflection model. A coarse grid
+    of aims is played once each without deflection, then the aims around the
+    best few are played samples times each with deflection. All the throws of
+    a pass run together in one BatchLaneSimulation, stepped at the game's dt
+    until every lane settles, or for at most horizon frames when one is given.
+    Aims stay on the integer power and ANGLE_STEP lattice a player can reach
+    with the keys.
+
+    A whole search takes longer than a frame, so the game calls think() once a
+    frame instead: each call searches for at most budget seconds, never
+    starting a step it expects to overrun, and the next call with the same
+    standing pins carries on where it stopped.
+    """
+
+    def __init__(self, budget=0.008, samples=8, keep=3, dt=FixedTimestep(rate=240).dt, horizon=None, seed=None):
+        self.budget = budget  # Seconds of search per think() call
+        self.samples = samples  # Deflection samples per refined aim
+        self.keep = keep  # Coarse aims refined
+        self.dt = dt
+        self.horizon = horizon  # Frames simulated after the approach, or None to let every lane settle
+        self.rng = np.random.default_rng(seed)
+        self.coarse_powers = np.arange(25, MAX_POWER + 1, 5)
+        self.coarse_offsets = np.arange(-10, 11, 2)  # Angle steps either side of straight
+        self.last_elapsed = 0.0
+        self._decision = None
+
+    def choose(self, pins):
+        """Return (power, angle, expected pins knocked down) for a throw at pins"""
+        start = time.perf_counter()
+        choice = _Decision(self, standing_mask(pins)).run(math.inf)
+        self.last_elapsed = time.perf_counter() - start
+        return choice
+
+    def think(self, pins):
+        """Search for up to budget seconds; returns choose()'s result once decided, else None"""
+        standing = standing_mask(pins)
+        if self._decision is None or not np.array_equal(self._decision.standing, standing):
+            self._decision = _Decision(self, standing)
+        choice = self._decision.run(time.perf_counter() + self.budget)
+        if choice is not None:
+            self._decision = None
+        return choice
+
+    def _throws(self, powers, offsets, standing, samples, deflect):
+        """A batch with every aim thrown samples times, aim by aim"""
+        sim = BatchLaneSimulation(len(powers) * samples, deflect=deflect, rng=self.rng, settle=True)
+        sim.reset_pins(standing=standing)
+        sim.throw(np.repeat(powers, samples), STRAIGHT + np.repeat(offsets, samples) * ANGLE_STEP)
+        return sim
+
+class _Decision:
+    """One throw search, run a slice at a time"""
+
+    def __init__(self, ai, standing):
+        self.ai = ai
+        self.standing = standing
+        self.choice = None
+        if not standing.any():
+            self.choice = MAX_POWER, STRAIGHT, 0.0
+            return
+
+        # Coarse pass: one deterministic throw per grid aim
+        powers, offsets = np.meshgrid(ai.coarse_powers, ai.coarse_offsets, indexing="ij")
+        self.powers, self.offsets = powers.ravel(), offsets.ravel()
+        self.sim = ai._throws(self.powers, self.offsets, standing, 1, False)
+        self.refining = False
+        self.steps = 0
+        self.step_time = 0.0  # Length of the last step, to avoid starting one past the deadline
+
+    def run(self, deadline):
+        """Search until decided or the deadline; returns the choice, or None if still searching"""
+        ai = self.ai
+        max_steps = math.inf if ai.horizon is None else math.ceil(ai.horizon / ai.dt)
+        stepped = False
+        while self.choice is None:
+            if self.steps < max_steps and self.sim.busy().any():
+                # Every call makes progress, even after a step longer than the budget
+                if stepped and time.perf_counter() + self.step_time > deadline:
+                    return None
+                stepped = True
+                began = time.perf_counter()
+                self.sim.step(ai.dt)
+                self.step_time = time.perf_counter() - began
+                self.steps += 1
+            elif not self.refining:
+                # Refine around the best coarse aims, with deflection
+                best = np.argsort(-self.sim.knocked_down, kind="stable")[:ai.keep]
+                candidates = sorted({(int(min(max(self.powers[index] + power_step, 0), MAX_POWER)),
+                                      int(self.offsets[index] + angle_step))
+                                     for index in best for power_step in (-2, 0, 2) for angle_step in (-1, 0, 1)})
+                self.powers = np.array([power for power, _ in candidates])
+                self.offsets = np.array([offset for _, offset in candidates])
+                self.sim = ai._throws(self.powers, self.offsets, self.standing, ai.samples, True)
+                self.refining = True
+                self.steps = 0
+            else:
+                expected = self.sim.knocked_down.reshape(len(self.powers), ai.samples).mean(axis=1)
+                choice = int(np.argmax(expected))
+                self.choice = (int(self.powers[choice]), STRAIGHT + int(self.offsets[choice]) * ANGLE_STEP,
+                               float(expected[choice]))
+        return self.choice
+
+def benchmark(decisions=50, seed=0):
+    """Time think() calls against the frame budget and compare the picks with a straight throw"""
+    ai = BowlingAI(seed=seed)
+    rng = np.random.default_rng(seed)
+    racks = [np.ones(10, dtype=bool)] + [rng.random(10) < 0.4 for _ in range(decisions - 1)]
+
+    timings = []
+    cpu_timings = []  # Wall time also counts time the OS gave to other processes
+    frames = []
+    gains = []
+    for standing in racks:
+        pins = [pin for pin, up in zip(setup_pins(), standing) if up]
+        choice = None
+        calls = 0
+        while choice is None:
+            began, cpu_began = time.perf_counter(), time.process_time()
+            choice = ai.think(pins)
+            timings.append(time.perf_counter() - began)
+            cpu_timings.append(time.process_time() - cpu_began)
+            calls += 1
+        frames.append(calls)
+        power, angle, expected = choice
+
+        # Check the pick and a straight full-power throw with fresh deflection samples
+        check = BatchLaneSimulation(400, rng=rng, settle=True)
+        check.reset_pins(standing=standing)
+        check.throw(np.repeat([power, MAX_POWER], 200), np.repeat([angle, STRAIGHT], 200))
+        check.run(ai.dt)
+        picked, straight = check.knocked_down.reshape(2, 200).mean(axis=1)
+        gains.append((picked, straight))
+
+    timings = np.array(timings) * 1000
+    cpu_timings = np.array(cpu_timings) * 1000
+    picked, straight = np.mean(gains, axis=0)
+    print(f"{decisions} decisions: {np.mean(frames):.0f} frames each on average, {max(frames)} at most")
+    print(f"Per frame: mean {timings.mean():.1f} ms, 99th percentile {np.percentile(timings, 99):.1f} ms, "
+          f"worst {timings.max():.1f} ms (budget {ai.budget * 1000:.0f} ms)")
+    print(f"CPU per frame: mean {cpu_timings.mean():.1f} ms, 99th percentile {np.percentile(cpu_timings, 99):.1f} ms, "
+          f"worst {cpu_timings.max():.1f} ms")
+    print(f"Pins per throw: AI {picked:.2f}, straight full-power throw {straight:.2f}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -1,9 +1,16 @@
 import random
+import sys
 import time
 import os
 
+from BowlingScore import ScoreKeeper
+
+CLEAR_SCREEN = "\033[H\033[2J"  # ANSI: cursor home, erase screen
+
 class BowlingGame:
-    def __init__(self):
+    def __init__(self, rng=random, ansi=False):
+        self.rng = rng  # Anything with random(), e.g. random.Random or a NumPy Generator
+        self.ansi = ansi  # Clear the screen with escape codes instead of a shell command
         self.total_frames = 10
         self.current_frame = 1
         self.pins = 10
@@ -11,6 +18,7 @@ class BowlingGame:
         self.frame_scores = [0] * self.total_frames
         self.throws = []
         self.frame_throws = []
+        self.score_keeper = ScoreKeeper(self.total_frames)
         self.game_over = False
         
     def reset_pins(self):
@@ -24,12 +32,13 @@ class BowlingGame:
             return 0
             
         # Simulate knocking down random number of pins
-        knocked_down = random.randint(0, self.pins)
+        knocked_down = int(self.rng.random() * (self.pins + 1))
         self.pins -= knocked_down
         
         # Add throw to current frame
         self.frame_throws.append(knocked_down)
         self.throws.append(knocked_down)
+        self.score_keeper.add_throw(knocked_down)
         
         return knocked_down
         
@@ -43,61 +52,20 @@ class BowlingGame:
         
     def calculate_frame_score(self, frame_index):
         """Calculate score for a specific frame"""
-        throw_index = 0
-        score = 0
-        
-        # Calculate throw index for the current frame
-        for i in range(frame_index):
-            if i < frame_index - 1:
-                # For previous frames, add number of throws
-                if self.is_strike_at(i):
-                    throw_index += 1
-                else:
-                    throw_index += 2
-            else:
-                # For current frame
-                throw_index = throw_index
-                
-        # Calculate score based on frame type
-        if self.is_strike_at(frame_index):
-            # Strike: 10 + next two throws
-            score = 10
-            if len(self.throws) > throw_index + 2:
-                score += self.throws[throw_index + 1] + self.throws[throw_index + 2]
-        elif self.is_spare_at(frame_index):
-            # Spare: 10 + next throw
-            score = 10
-            if len(self.throws) > throw_index + 2:
-                score += self.throws[throw_index + 2]
-        else:
-            # Open frame: sum of two throws
-            if throw_index + 1 < len(self.throws):
-                score = self.throws[throw_index] + self.throws[throw_index + 1]
-            elif throw_index < len(self.throws):
-                score = self.throws[throw_index]
-                
-        return score
+        return self.score_keeper.frame_scores[frame_index]
         
     def is_strike_at(self, frame_index):
         """Check if a specific frame is a strike"""
-        throw_index = 0
-        for i in range(frame_index):
-            if self.is_strike_at(i):
-                throw_index += 1
-            else:
-                throw_index += 2
-                
-        return throw_index < len(self.throws) and self.throws[throw_index] == 10
+        if frame_index >= len(self.score_keeper.frame_starts):
+            return False
+        throw_index = self.score_keeper.frame_starts[frame_index]
+        return self.throws[throw_index] == 10
         
     def is_spare_at(self, frame_index):
         """Check if a specific frame is a spare"""
-        throw_index = 0
-        for i in range(frame_index):
-            if self.is_strike_at(i):
-                throw_index += 1
-            else:
-                throw_index += 2
-                
+        if frame_index >= len(self.score_keeper.frame_starts):
+            return False
+        throw_index = self.score_keeper.frame_starts[frame_index]
         return (throw_index + 1 < len(self.throws) and 
                 self.throws[throw_index] + self.throws[throw_index + 1] == 10 and
                 self.throws[throw_index] != 10)
@@ -197,7 +165,10 @@ class BowlingGame:
         
     def display_scoreboard(self):
         """Display the current scoreboard"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if self.ansi:
+            print(CLEAR_SCREEN, end="")
+        else:
+            os.system('cls' if os.name == 'nt' else 'clear')
         print("\n" + "=" * 40)
         print("BOWLING SCOREBOARD")
         print("=" * 40)
@@ -252,7 +223,101 @@ class BowlingGame:
         else:
             print("Nice try! Better luck next time!")
 
+def _put_numbers(lines, column, values, width):
+    """Write values right-aligned into columns [column, column + width) of a byte matrix"""
+    for place in range(width):
+        digits = 48 + values // 10 ** place % 10  # ASCII '0' + digit
+        if place:
+            digits[values < 10 ** place] = 32  # Leading zeros become spaces
+        lines[:, column + width - 1 - place] = digits
+
+def format_games(throws, frame_scores, totals, counts):
+    """Format games as fixed-width text lines: total, frame scores | throws
+
+    All the arguments are NumPy arrays with one row per game. The lines are
+    built as one byte matrix, so formatting costs no Python per game.
+    """
+    import numpy as np
+
+    games, slots = throws.shape
+    frames = frame_scores.shape[1]
+    throws_column = 3 + 3 * frames + 2
+    lines = np.full((games, throws_column + 3 * slots + 1), 32, dtype=np.uint8)
+    _put_numbers(lines, 0, totals.astype(np.int32), 3)
+    for frame in range(frames):
+        _put_numbers(lines, 4 + 3 * frame, frame_scores[:, frame].astype(np.int32), 2)
+    lines[:, throws_column - 1] = ord("|")
+    for slot in range(slots):
+        column = throws_column + 1 + 3 * slot
+        _put_numbers(lines, column, throws[:, slot].astype(np.int32), 2)
+        lines[counts <= slot, column:column + 2] = 32  # Slots after the last throw
+    lines[:, -1] = ord("\n")
+    return lines.tobytes()
+
+def autoplay(games, seed=None, output=None, binary=False):
+    """Play games with no prompts or pauses, streaming the results
+
+    Games are the text game's games, played in NumPy batches by Simulation:
+    game 0 of a seeded run is the one BowlingGame(rng=np.random.default_rng(seed))
+    plays. Text output is one line per game; binary output is a GameLog
+    whose seed field holds each game's index i in the run, so
+    BowlingGame(rng=interactive_rng(seed, i)) replays game i of a seeded run.
+    A binary run without a seed draws one and prints it to stderr, since the
+    indexes replay nothing without it. Returns the total score of every game
+    played.
+    """
+    import numpy as np
+    from GameLog import GameLogWriter, throw_counts
+    from Simulation import simulate_games
+
+    if binary and seed is None:
+        seed = random.getrandbits(63)
+        print(f"Seed {seed}", file=sys.stderr)
+    writer = GameLogWriter(output) if binary else None
+    stream = open(output, "wb") if output and not binary else sys.stdout.buffer
+    totals = np.empty(games, dtype=np.int32)
+    played = 0
+    try:
+        for throws, frame_scores, chunk_totals in simulate_games(games, seed):
+            totals[played:played + len(throws)] = chunk_totals
+            if writer is not None:
+                writer.write(throws, frame_scores, np.arange(played, played + len(throws)))
+            else:
+                stream.write(format_games(throws, frame_scores, chunk_totals, throw_counts(throws)))
+            played += len(throws)
+    finally:
+        if writer is not None:
+            writer.close()
+        if stream is not sys.stdout.buffer:
+            stream.close()
+        else:
+            stream.flush()
+    return totals
+
 # Run the game if this script is executed directly
 if __name__ == "__main__":
-    game = BowlingGame()
-    game.play_game()
\ No newline at end of file
+    import argparse  # Only the command line needs it; importing the game stays cheap
+    parser = argparse.ArgumentParser(description="Text bowling game")
+    parser.add_argument("--autoplay", type=int, metavar="N", help="play N games without prompts and print the results")
+    parser.add_argument("--format", choices=("text", "binary"), default="text",
+                        help="autoplay output: one line per game, or a binary game log")
+    parser.add_argument("--output", metavar="FILE", help="write autoplay results to FILE instead of stdout")
+    parser.add_argument("--seed", type=int, help="seed for the pinfall")
+    parser.add_argument("--ansi", action="store_true", help="redraw the scoreboard with ANSI escape codes")
+    args = parser.parse_args()
+
+    if args.autoplay is None:
+        rng = random
+        if args.seed is not None:
+            import numpy as np
+            rng = np.random.default_rng(args.seed)  # Game 0 of the same autoplay seed
+        game = BowlingGame(rng, args.ansi)
+        game.play_game()
+    else:
+        if args.format == "binary" and not args.output:
+            parser.error("--format binary needs --output")
+        start = time.perf_counter()
+        totals = autoplay(args.autoplay, args.seed, args.output, args.format == "binary")
+        elapsed = time.perf_counter() - start
+        print(f"{args.autoplay:,} games in {elapsed:.2f}s ({args.autoplay / elapsed:,.0f} games/s), "
+              f"mean score {totals.mean():.2f}", file=sys.stderr)
\ No newline at end of file
@@ -1,11 +1,19 @@
 import pygame
+import argparse
 import sys
-import random
 import math
+import random
 import time
+from functools import partial
 
-# Initialize pygame
-pygame.init()
+from AimPreview import AimPreview
+from BowlingLane import BowlingLane, Recording
+from DirtyRenderer import DirtyRenderer
+from FrameScheduler import FrameScheduler
+from FrameProfiler import FrameProfiler
+from Startup import font, init_display
+from SurfaceCache import SurfaceCache
+from PinPhysics import Ball as BallBody, Pin as PinBody, FixedTimestep
 
 # Constants
 SCREEN_WIDTH = 800
@@ -18,38 +26,38 @@ BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
 BROWN = (139, 69, 19)
 BEIGE = (245, 245, 220)
+GRAY = (200, 200, 200)
 
-class Pin:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 15
-        self.is_hit = False
-        
+# Posted by the network thread to wake an idle loop
+NETWORK_EVENT = pygame.USEREVENT + 1
+
+# Pre-rendered text and sprites shared by everything drawn
+surfaces = SurfaceCache()
+
+class Pin(PinBody):
     def draw(self, screen):
+        corner = (int(self.x) - self.radius, int(self.y) - self.radius)
         if not self.is_hit:
-            pygame.draw.circle(screen, WHITE, (self.x, self.y), self.radius)
-            pygame.draw.circle(screen, BLACK, (self.x, self.y), self.radius, 2)
-            
-    def check_collision(self, ball):
-        distance = math.sqrt((self.x - ball.x)**2 + (self.y - ball.y)**2)
-        return distance < (self.radius + ball.radius) and not self.is_hit
+            screen.blit(surfaces.circle(self.radius, WHITE), corner)
+            screen.blit(surfaces.circle(self.radius, BLACK, 2), corner)
+        else:
+            # Draw knocked pin flying off the lane
+            screen.blit(surfaces.circle(self.radius, GRAY), corner)
 
-class Ball:
+    def bounds(self):
+        return pygame.Rect(int(self.x) - self.radius - 1, int(self.y) - self.radius - 1,
+                           2 * self.radius + 3, 2 * self.radius + 3)
+
+class Ball(BallBody):
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 20
+        super().__init__(x, y, width=SCREEN_WIDTH, height=SCREEN_HEIGHT)
         self.color = BLUE
-        self.speed_x = 0
-        self.speed_y = 0
-        self.moving = False
-        self.power = 0
-        self.angle = 0
         
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-        pygame.draw.circle(screen, BLACK, (int(self.x), int(self.y)), self.radius, 2)
+    def draw(self, screen, position=None):
+        x, y = position or (self.x, self.y)
+        corner = (int(x) - self.radius, int(y) - self.radius)
+        screen.blit(surfaces.circle(self.radius, self.color), corner)
+        screen.blit(surfaces.circle(self.radius, BLACK, 2), corner)
         
         # Draw power meter when not moving
         if not self.moving:
@@ -58,274 +66,367 @@ class Ball:
                             (self.x + math.cos(self.angle) * self.power * 2, 
                              self.y + math.sin(self.angle) * self.power * 2), 
                             3)
-        
-    def update(self):
-        if self.moving:
-            self.x += self.speed_x
-            self.y += self.speed_y
-            
-            # Apply friction
-            self.speed_x *= 0.98
-            self.speed_y *= 0.98
-            
-            # Check if ball has stopped
-            if abs(self.speed_x) < 0.1 and abs(self.speed_y) < 0.1:
-                self.speed_x = 0
-                self.speed_y = 0
-                self.moving = False
-                
-            # Check boundaries
-            if self.x < self.radius:
-                self.x = self.radius
-                self.speed_x = -self.speed_x * 0.8
-            elif self.x > SCREEN_WIDTH - self.radius:
-                self.x = SCREEN_WIDTH - self.radius
-                self.speed_x = -self.speed_x * 0.8
-                
-            if self.y < self.radius:
-                self.y = self.radius
-                self.speed_y = -self.speed_y * 0.8
-            elif self.y > SCREEN_HEIGHT - self.radius:
-                self.y = SCREEN_HEIGHT - self.radius
-                self.speed_y = -self.speed_y * 0.8
-                
-    def throw(self):
+
+    def bounds(self, position=None):
+        x, y = position or (self.x, self.y)
+        rect = pygame.Rect(int(x) - self.radius - 1, int(y) - self.radius - 1,
+                           2 * self.radius + 3, 2 * self.radius + 3)
         if not self.moving:
-            self.speed_x = math.cos(self.angle) * (self.power / 5)
-            self.speed_y = math.sin(self.angle) * (self.power / 5)
-            self.moving = True
-            
-    def reset(self, x, y):
-        self.x = x
-        self.y = y
-        self.speed_x = 0
-        self.speed_y = 0
-        self.moving = False
-        self.power = 0
-        self.angle = -math.pi/2  # Pointing upward
+            # Include the power meter
+            end_x = x + math.cos(self.angle) * self.power * 2
+            end_y = y + math.sin(self.angle) * self.power * 2
+            rect.union_ip(pygame.Rect(int(min(x, end_x)) - 3, int(min(y, end_y)) - 3,
+                                      int(abs(end_x - x)) + 7, int(abs(end_y - y)) + 7))
+        return rect
 
-class BowlingGame:
-    def __init__(self):
+class BowlingGame(BowlingLane):
+    def __init__(self, seed=None, playback=None, record_path=None, computer=False, client=None):
+        init_display()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Bowling Game")
         self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler(self.clock, FPS)
+        self.timestep = FixedTimestep(rate=240)
         
-        self.ball = Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
-        self.pins = self.setup_pins()
-        
-        self.frame = 1
-        self.throw_number = 1
-        self.max_frames = 10
-        self.scores = [0] * self.max_frames
-        self.throws_history = []
-        self.game_over = False
-        
-        self.font = pygame.font.SysFont(None, 36)
-        self.small_font = pygame.font.SysFont(None, 24)
-        
-    def setup_pins(self):
-        pins = []
-        start_x = SCREEN_WIDTH // 2
-        start_y = 100
-        spacing = 40
-        
-        # Create a triangular formation of pins (4 rows)
-        for row in range(4):
-            for col in range(row + 1):
-                x = start_x + (col - row/2) * spacing
-                y = start_y + row * spacing
-                pins.append(Pin(x, y))
-                
-        return pins
-        
-    def reset_pins(self):
-        self.pins = self.setup_pins()
-        
-    def reset_ball(self):
-        self.ball.reset(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
-        
-    def count_pins_hit(self):
-        return sum(1 for pin in self.pins if pin.is_hit)
-        
-    def next_throw(self):
-        pins_hit = self.count_pins_hit()
-        self.throws_history.append(pins_hit)
-        
-        # Update score
-        if self.throw_number == 1:
-            if pins_hit == 10:  # Strike
-                self.throw_number = 1
-                self.frame += 1
-                self.reset_pins()
-            else:
-                self.throw_number = 2
-        else:  # Second throw
-            self.throw_number = 1
-            self.frame += 1
-            self.reset_pins()
-            
-        self.reset_ball()
+        # Frames, throws, scoring and the seeded physics live in the lane
+        players = client.players if client else 2 if computer else 1
+        super().__init__(seed, self.timestep.dt, playback, ball_class=Ball, pin_class=Pin, players=players)
+        self.record_path = record_path
+        
+        # Over the network every seat is a player, and this client bowls for its own
+        self.client = client
+        self.throw_sent = False  # Waiting for the relay to echo our throw
+        if self.client:
+            self.players[client.seat].name = "You"
+        
+        # Against the computer, player 2 is the AI. Network rooms are all people
+        self.computer = computer and client is None and len(self.players) == 2
+        self.ai = None
+        if self.computer:
+            from BowlingAI import BowlingAI  # Brings in NumPy, so only when playing the computer
+            self.ai = BowlingAI()
+            self.players[0].name = "You"
+            self.players[1].name = "Computer"
+        self.ai_choice = None  # The computer's decided throw, held until its pause is over
+        self.computer_paused = False
+        
+        self.font = font(36)
+        self.small_font = font(24)
+        
+        self.preview = AimPreview(dt=self.timestep.dt)
+        self.aiming = False
+        
+        self.renderer = DirtyRenderer(self.screen, self.draw_background)
+        self.profiler = FrameProfiler()
+        self.saved = None  # Quick-save snapshot
+        
+    def restart(self):
+        # A new game on the same display, fonts, caches and players
+        self.save_recording()
+        self.cancel_computer_throw()
+        self.saved = None  # The quick-save belongs to the game that ended
+        self.new_game()
+        self.timestep = FixedTimestep(rate=240)
+        self.renderer.invalidate()
+        
+    def quick_load(self):
+        # Back to the quick-save, ball and pins mid-flight included
+        self.cancel_computer_throw()
+        self.restore(self.saved)
+        self.timestep = FixedTimestep(rate=240)
+        self.renderer.invalidate()
+        
+    def computer_turn(self):
+        return self.computer and self.player == 1 and not self.game_over
+        
+    def remote_turn(self):
+        return (self.client is not None and not self.game_over and
+                (self.player != self.client.seat or self.throw_sent or self.client.closed))
         
-        # Check if game is over
-        if self.frame > self.max_frames:
-            self.game_over = True
+    def send_throw(self):
+        # Our throw is played like everyone else's, once the relay echoes it
+        if self.remote_turn() or self.ball.moving:
+            return
+        self.client.send_throw(self.ball.power, self.ball.angle, random.getrandbits(32))
+        self.throw_sent = True
+        
+    def play_network_throws(self):
+        # Relayed throws wait until the lane is at rest, then are played in order
+        from Multiplayer import apply_throw
+        while self.client.throws and not self.sim.busy():
+            seat, power, angle, seed = self.client.throws.popleft()
+            apply_throw(self, seat, power, angle, seed)
+            if seat == self.client.seat:
+                self.throw_sent = False
+        
+    def end_computer_pause(self):
+        self.computer_paused = True
+        
+    def cancel_computer_throw(self):
+        self.scheduler.cancel(self.end_computer_pause)
+        self.computer_paused = False
+        self.ai_choice = None
+        
+    def computer_throw(self):
+        # Search a frame's budget at a time; throw once decided and the pause is over
+        if self.ai_choice is None:
+            self.ai_choice = self.ai.think(self.pins)
+        if self.ai_choice is None or not self.computer_paused:
+            return
+        power, angle, _ = self.ai_choice
+        self.ai_choice = None
+        self.computer_paused = False
+        self.set_power(power)
+        self.set_angle(angle)
+        self.throw()
+        
+    def save_recording(self):
+        if self.record_path:
+            self.recording.save(self.record_path)
             
-    def calculate_score(self):
-        throw_idx = 0
-        for frame in range(self.max_frames):
-            if throw_idx >= len(self.throws_history):
-                break
-                
-            # Strike
-            if self.throws_history[throw_idx] == 10:
-                if throw_idx + 2 < len(self.throws_history):
-                    self.scores[frame] = 10 + self.throws_history[throw_idx + 1] + self.throws_history[throw_idx + 2]
-                throw_idx += 1
-            # Spare
-            elif throw_idx + 1 < len(self.throws_history) and self.throws_history[throw_idx] + self.throws_history[throw_idx + 1] == 10:
-                if throw_idx + 2 < len(self.throws_history):
-                    self.scores[frame] = 10 + self.throws_history[throw_idx + 2]
-                throw_idx += 2
-            # Open frame
-            else:
-                if throw_idx + 1 < len(self.throws_history):
-                    self.scores[frame] = self.throws_history[throw_idx] + self.throws_history[throw_idx + 1]
-                throw_idx += 2
-                
-    def draw_lane(self):
+    def draw_background(self, surface):
+        # Static layer, drawn once and cached by the renderer
+        surface.fill(BLACK)
+        self.draw_lane(surface)
+        
+    def draw_lane(self, surface):
         # Draw bowling lane
-        pygame.draw.rect(self.screen, BEIGE, (100, 50, SCREEN_WIDTH - 200, SCREEN_HEIGHT - 100))
-        pygame.draw.rect(self.screen, BROWN, (100, 50, SCREEN_WIDTH - 200, SCREEN_HEIGHT - 100), 10)
+        pygame.draw.rect(surface, BEIGE, (100, 50, SCREEN_WIDTH - 200, SCREEN_HEIGHT - 100))
+        pygame.draw.rect(surface, BROWN, (100, 50, SCREEN_WIDTH - 200, SCREEN_HEIGHT - 100), 10)
         
         # Draw gutters
-        pygame.draw.rect(self.screen, BLACK, (90, 50, 10, SCREEN_HEIGHT - 100))
-        pygame.draw.rect(self.screen, BLACK, (SCREEN_WIDTH - 100, 50, 10, SCREEN_HEIGHT - 100))
+        pygame.draw.rect(surface, BLACK, (90, 50, 10, SCREEN_HEIGHT - 100))
+        pygame.draw.rect(surface, BLACK, (SCREEN_WIDTH - 100, 50, 10, SCREEN_HEIGHT - 100))
         
     def draw_scoreboard(self):
+        # The finished scoreboard is cached until the scores change
+        board = surfaces.get(("scoreboard", tuple(self.scores)), self.render_scoreboard)
+        self.screen.blit(board, (10, 10))
+        
+    def render_scoreboard(self):
+        board = pygame.Surface((SCREEN_WIDTH - 20, 80))
+        
         # Draw scoreboard background
-        pygame.draw.rect(self.screen, WHITE, (10, 10, SCREEN_WIDTH - 20, 80))
-        pygame.draw.rect(self.screen, BLACK, (10, 10, SCREEN_WIDTH - 20, 80), 2)
+        pygame.draw.rect(board, WHITE, (0, 0, SCREEN_WIDTH - 20, 80))
+        pygame.draw.rect(board, BLACK, (0, 0, SCREEN_WIDTH - 20, 80), 2)
         
         # Draw frame numbers
         for i in range(self.max_frames):
-            x = 20 + i * 75
-            pygame.draw.rect(self.screen, WHITE, (x, 20, 70, 60))
-            pygame.draw.rect(self.screen, BLACK, (x, 20, 70, 60), 2)
+            x = 10 + i * 75
+            pygame.draw.rect(board, WHITE, (x, 10, 70, 60))
+            pygame.draw.rect(board, BLACK, (x, 10, 70, 60), 2)
             
             # Frame number
-            frame_text = self.small_font.render(f"Frame {i+1}", True, BLACK)
-            self.screen.blit(frame_text, (x + 10, 25))
+            frame_text = surfaces.text(self.small_font, f"Frame {i+1}", BLACK)
+            board.blit(frame_text, (x + 10, 15))
             
             # Score
             if i < len(self.scores) and self.scores[i] > 0:
-                score_text = self.font.render(str(self.scores[i]), True, BLACK)
-                self.screen.blit(score_text, (x + 25, 45))
+                score_text = surfaces.text(self.font, str(self.scores[i]), BLACK)
+                board.blit(score_text, (x + 25, 35))
+        return board
                 
+    def preview_bounds(self, prediction):
+        path, falling = prediction
+        xs = [int(x) for x, _ in path]
+        ys = [int(y) for _, y in path]
+        rect = pygame.Rect(min(xs) - 1, min(ys) - 1, max(xs) - min(xs) + 3, max(ys) - min(ys) + 3)
+        for index in falling:
+            rect.union_ip(self.pins[index].bounds())
+        return rect
+        
+    def draw_preview(self, prediction):
+        # Draw the predicted path and outline the pins it will knock down
+        path, falling = prediction
+        if len(path) > 1:
+            pygame.draw.lines(self.screen, RED, False, path, 1)
+        for index in falling:
+            pin = self.pins[index]
+            self.screen.blit(surfaces.circle(pin.radius, RED, 3), (int(pin.x) - pin.radius, int(pin.y) - pin.radius))
+            
     def draw_game_info(self):
         # Draw current frame and throw info
-        frame_text = self.font.render(f"Frame: {self.frame}", True, WHITE)
-        throw_text = self.font.render(f"Throw: {self.throw_number}", True, WHITE)
+        frame_text = surfaces.text(self.font, f"Frame: {self.frame}", WHITE)
+        throw_text = surfaces.text(self.font, f"Throw: {self.throw_number}", WHITE)
         
         self.screen.blit(frame_text, (20, SCREEN_HEIGHT - 40))
         self.screen.blit(throw_text, (150, SCREEN_HEIGHT - 40))
         
         # Draw power meter
-        power_text = self.small_font.render(f"Power: {self.ball.power}", True, WHITE)
+        power_text = surfaces.text(self.small_font, f"Power: {self.ball.power}", WHITE)
         self.screen.blit(power_text, (SCREEN_WIDTH - 150, SCREEN_HEIGHT - 40))
         
         # Draw instructions
-        if not self.ball.moving:
-            instructions = self.small_font.render("UP/DOWN: Adjust power, LEFT/RIGHT: Aim, SPACE: Throw", True, WHITE)
+        if not self.ball.moving and not self.computer_turn() and not self.remote_turn():
+            instructions = surfaces.text(self.small_font, "UP/DOWN: Adjust power, LEFT/RIGHT: Aim, SPACE: Throw", WHITE)
             self.screen.blit(instructions, (SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT - 40))
             
+    def draw_player(self):
+        # Whose turn it is, with more than one player
+        if self.client and self.client.closed:
+            player_text = surfaces.text(self.small_font, "Disconnected", WHITE)
+        else:
+            player_text = surfaces.text(self.small_font, f"{self.players[self.player].name} to bowl", WHITE)
+        self.screen.blit(player_text, (20, SCREEN_HEIGHT - 65))
+        
     def draw_game_over(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(surfaces.overlay((SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 180)), (0, 0))
         
-        game_over_text = self.font.render("GAME OVER", True, WHITE)
-        total_score = sum(self.scores)
-        score_text = self.font.render(f"Final Score: {total_score}", True, WHITE)
-        restart_text = self.font.render("Press R to restart or Q to quit", True, WHITE)
+        game_over_text = surfaces.text(self.font, "GAME OVER", WHITE)
+        if len(self.players) > 1:
+            score_text = surfaces.text(self.font, "   ".join(f"{player.name}: {sum(player.scores)}"
+                                                          for player in self.players), WHITE)
+        else:
+            score_text = surfaces.text(self.font, f"Final Score: {sum(self.scores)}", WHITE)
+        restart_text = surfaces.text(self.font, "Press R to restart or Q to quit", WHITE)
         
         self.screen.blit(game_over_text, (SCREEN_WIDTH // 2 - 80, SCREEN_HEIGHT // 2 - 50))
         self.screen.blit(score_text, (SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2))
         self.screen.blit(restart_text, (SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 + 50))
         
+    def toggle_profiler(self):
+        # Time each phase of the frame and show the overlay, or stop
+        if self.profiler.enabled:
+            self.profiler.disable()
+            return
+        self.profiler.enable([
+            (self.ball, "update", "ball.update"),
+            (self.sim, "ball_hits", "collisions"),
+            (self.sim, "resolve_pin_collisions", "pin collisions"),
+            (self.preview, "predict", "aim preview"),
+            *([(self.ai, "think", "computer")] if self.ai else []),
+            (Pin, "draw", "draw pins"),
+            (self.ball, "draw", "draw ball"),
+            (self, "draw_preview", "draw_preview"),
+            (self, "draw_scoreboard", "draw_scoreboard"),
+            (self, "draw_game_info", "draw_game_info"),
+            (self, "draw_game_over", "draw_game_over"),
+            (self.renderer, "present", "display.update"),
+        ])
+        
+    def scene_items(self):
+        # Everything drawn over the lane, in drawing order, as
+        # (id, key, bounds, draw) for the dirty-rect renderer
+        items = [(id(pin), (int(pin.x), int(pin.y), pin.is_hit), pin.bounds(), partial(pin.draw, self.screen))
+                 for pin in self.pins]
+        
+        # Predicted throw while aiming
+        if self.aiming:
+            prediction = self.preview.predict(self.ball, self.pins)
+            items.append(("preview", prediction, self.preview_bounds(prediction), partial(self.draw_preview, prediction)))
+            
+        # Ball between its last two physics steps
+        position = self.timestep.interpolate(self.ball)
+        ball_key = (int(position[0]), int(position[1]), self.ball.moving, self.ball.power, self.ball.angle)
+        items.append(("ball", ball_key, self.ball.bounds(position), partial(self.ball.draw, self.screen, position)))
+        
+        # UI
+        items.append(("scoreboard", tuple(self.scores), pygame.Rect(10, 10, SCREEN_WIDTH - 20, 80), self.draw_scoreboard))
+        info_key = (self.frame, self.throw_number, self.ball.power, self.ball.moving, self.computer_turn(),
+                    self.remote_turn())
+        items.append(("info", info_key, pygame.Rect(0, SCREEN_HEIGHT - 45, SCREEN_WIDTH, 45), self.draw_game_info))
+        if len(self.players) > 1:
+            player_key = (self.player, self.client is not None and self.client.closed)
+            items.append(("player", player_key, pygame.Rect(20, SCREEN_HEIGHT - 65, 160, 20), self.draw_player))
+        if self.game_over:
+            totals = tuple(sum(player.scores) for player in self.players)
+            items.append(("game over", totals, self.screen.get_rect(), self.draw_game_over))
+        if self.profiler.enabled:
+            items.append(self.profiler.overlay_item(self.screen, self.small_font))
+        return items
+        
     def run(self):
         running = True
         
         while running:
-            # Handle events
-            for event in pygame.event.get():
+            # Handle events, sleeping until input while nothing moves
+            pending = self.client is not None and len(self.client.throws) > 0
+            thinking = self.computer_turn()  # The computer's search runs a slice every frame
+            events = self.scheduler.events(idle=not (self.sim.busy() or self.aiming or self.replaying or pending or
+                                                     thinking))
+            self.profiler.start_frame()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE and not self.ball.moving and not self.game_over:
-                        self.ball.throw()
-                    elif event.key == pygame.K_r and self.game_over:
-                        self.__init__()  # Reset the game
+                    if event.key == pygame.K_SPACE and self.client:
+                        self.send_throw()
+                    elif event.key == pygame.K_SPACE and not self.replaying and not self.computer_turn():
+                        self.throw()
+                    elif event.key == pygame.K_r and self.game_over and not self.client:
+                        self.restart()
+                    elif event.key == pygame.K_F5 and not self.client:
+                        self.saved = self.snapshot()
+                    elif event.key == pygame.K_F9 and self.saved and not self.client:
+                        self.quick_load()
                     elif event.key == pygame.K_q and self.game_over:
                         running = False
+                    elif event.key == pygame.K_F3:
+                        self.toggle_profiler()
+                    elif event.key == pygame.K_F4 and self.profiler.enabled:
+                        self.profiler.dump("frame_profile.csv")
                         
-            # Handle continuous key presses
-            if not self.ball.moving and not self.game_over:
+            self.profiler.mark("events")
+                        
+            # Handle continuous key presses; a replay supplies its own input
+            self.aiming = False
+            if (not self.ball.moving and not self.game_over and not self.replaying and not self.computer_turn() and
+                    not self.remote_turn()):
                 keys = pygame.key.get_pressed()
+                self.aiming = (keys[pygame.K_UP] or keys[pygame.K_DOWN] or
+                               keys[pygame.K_LEFT] or keys[pygame.K_RIGHT])
                 if keys[pygame.K_UP]:
-                    self.ball.power = min(self.ball.power + 1, 50)
+                    self.set_power(min(self.ball.power + 1, 50))
                 if keys[pygame.K_DOWN]:
-                    self.ball.power = max(self.ball.power - 1, 0)
+                    self.set_power(max(self.ball.power - 1, 0))
                 if keys[pygame.K_LEFT]:
-                    self.ball.angle = max(self.ball.angle - 0.05, -math.pi)
+                    self.set_angle(max(self.ball.angle - 0.05, -math.pi))
                 if keys[pygame.K_RIGHT]:
-                    self.ball.angle = min(self.ball.angle + 0.05, 0)
+                    self.set_angle(min(self.ball.angle + 0.05, 0))
                     
-            # Update
-            self.ball.update()
-            
-            # Check for collisions with pins
-            if self.ball.moving:
-                for pin in self.pins:
-                    if pin.check_collision(self.ball):
-                        pin.is_hit = True
-                        
-                        # Add some randomness to ball direction after hitting a pin
-                        angle = random.uniform(0, 2 * math.pi)
-                        speed = random.uniform(0.5, 2)
-                        self.ball.speed_x += math.cos(angle) * speed
-                        self.ball.speed_y += math.sin(angle) * speed
-                        
-                # Check if ball has stopped moving
-                if not self.ball.moving and not self.game_over:
-                    self.next_throw()
-                    self.calculate_score()
+            # The computer thinks through a short pause, so its turn can be seen
+            if self.computer_turn() and not self.sim.busy() and not self.replaying:
+                if not self.computer_paused and not self.scheduler.scheduled(self.end_computer_pause):
+                    self.scheduler.after(0.5, self.end_computer_pause)
+                self.computer_throw()
+            if self.client:
+                self.play_network_throws()
+            self.profiler.mark("input")
                     
-            # Draw
-            self.screen.fill(BLACK)
-            self.draw_lane()
-            
-            # Draw pins
-            for pin in self.pins:
-                pin.draw(self.screen)
-                
-            # Draw ball
-            self.ball.draw(self.screen)
-            
-            # Draw UI
-            self.draw_scoreboard()
-            self.draw_game_info()
-            
-            if self.game_over:
-                self.draw_game_over()
-                
-            # Update display
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            # Step the lane at its fixed rate for the time since the last frame;
+            # throws are scored on the tick they finish
+            self.timestep.advance(self, self.scheduler.elapsed)
+            self.profiler.mark("physics")
+                    
+            # Draw and push only what changed since the last frame
+            self.renderer.render(self.scene_items())
+            self.profiler.mark("render")
+            self.profiler.end_frame()
+            self.scheduler.tick()
             
+        self.save_recording()
+        if self.client:
+            self.client.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = BowlingGame()
+    parser = argparse.ArgumentParser(description="Visual bowling game")
+    parser.add_argument("--seed", type=int, help="seed for pin deflections")
+    parser.add_argument("--record", metavar="FILE", help="save the game's seed and inputs to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded game in real time")
+    opponents = parser.add_mutually_exclusive_group()
+    opponents.add_argument("--computer", action="store_true", help="take turns with a computer opponent")
+    opponents.add_argument("--connect", metavar="HOST:PORT", help="join a Multiplayer.py relay room")
+    args = parser.parse_args()
+    
+    playback = Recording.load(args.replay) if args.replay else None
+    client = None
+    if args.connect:
+        from Multiplayer import ThreadedClient, parse_address
+        print("Waiting for the room to fill...")
+        client = ThreadedClient(*parse_address(args.connect),
+                                on_receive=lambda: pygame.event.post(pygame.event.Event(NETWORK_EVENT)))
+    game = BowlingGame(args.seed, playback, args.record, args.computer, client)
     game.run()
\ No newline at end of file
@@ -0,0 +1,431 @@
+import math
+import random
+import struct
+import sys
+import time
+from collections import namedtuple
+
+from BowlingScore import ScoreKeeper
+from PinPhysics import LANE_WIDTH, LANE_HEIGHT, Ball, Pin, LaneSimulation, setup_pins
+
+MAGIC = b"BPRL"
+VERSION = 3
+HEADER = struct.Struct("<4sHBxQd")  # Magic, version, players (0 in version 1), seed, step length in frames
+EVENT = struct.Struct("<IBd")  # Tick, opcode, value
+
+# Opcodes
+SET_POWER = 1
+SET_ANGLE = 2
+THROW = 3
+SEED = 4  # Reseeds the pin deflections; version 3
+
+# Everything that decides how a game goes on, and the seed and inputs that replay it
+# up to here; events, players, ball and pins are tuples
+Snapshot = namedtuple("Snapshot", "seed dt frame throw_number player game_over ticks next_event events "
+                                  "knocked_down throw_finished players ball pins rng")
+
+class Recording:
+    """The seed and inputs of one game, enough to replay it exactly
+
+    events are (tick, opcode, value): the input takes effect just before
+    simulation step number tick.
+    """
+
+    def __init__(self, seed, dt, events=None, players=1):
+        self.seed = seed
+        self.dt = dt
+        self.events = events if events is not None else []
+        self.players = players
+
+    def save(self, path):
+        with open(path, "wb") as log_file:
+            log_file.write(HEADER.pack(MAGIC, VERSION, self.players, self.seed, self.dt))
+            log_file.write(b"".join(EVENT.pack(*event) for event in self.events))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as log_file:
+            data = log_file.read()
+        magic, version, players, seed, dt = HEADER.unpack_from(data)
+        if magic != MAGIC or version not in (1, 2, VERSION):
+            raise ValueError(f"{path} is not a version {VERSION} game recording")
+        return cls(seed, dt, list(EVENT.iter_unpack(memoryview(data)[HEADER.size:])), max(players, 1))
+
+class Player:
+    """One bowler's throws and scores on a lane"""
+
+    def __init__(self, name, max_frames=10):
+        self.name = name
+        self.throws_history = []
+        self.score_keeper = ScoreKeeper(max_frames)
+        self.scores = [0] * max_frames
+
+    def add_throw(self, pins_hit, throw_number):
+        """Record a throw that left pins_hit pins down in total; returns True if it ends the frame"""
+        # Pins stay down between throws, so only count the new ones
+        knocked_down = pins_hit
+        if throw_number == 2:
+            knocked_down -= self.throws_history[-1]
+        self.throws_history.append(knocked_down)
+        self.score_keeper.add_throw(knocked_down)
+        return throw_number == 2 or pins_hit == 10  # Strike or second throw
+
+    def snapshot(self):
+        return tuple(self.throws_history), tuple(self.scores), self.score_keeper.snapshot()
+
+    def restore(self, state):
+        throws_history, scores, score_keeper = state
+        self.throws_history[:] = throws_history
+        self.scores = list(scores)
+        self.score_keeper.restore(score_keeper)
+
+class BowlingLane:
+    """A ten-frame game on the physics lane, with no display attached
+
+    Every input goes through set_power(), set_angle() and throw(), which log
+    it against the simulation tick it takes effect on, and pin deflections
+    come from a Random seeded per game. The seed and the log therefore fix
+    the whole game: a lane built with playback=recording applies the logged
+    inputs at the same ticks and ends with the same throws and scores.
+
+    With several players they take turns a frame at a time. throws_history,
+    score_keeper and scores are those of the player whose turn it is.
+
+    snapshot() captures the whole game, including the ball, the pins and the
+    deflection RNG, and restore() returns to it in place. fork() restores a
+    snapshot into headless copies of the lane to try other throws from it.
+    """
+
+    def __init__(self, seed=None, dt=1, playback=None, ball_class=Ball, pin_class=Pin, players=1):
+        if playback is not None:
+            seed, dt, players = playback.seed, playback.dt, playback.players
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.dt = dt
+        self.rng = random.Random(seed)
+        self.recording = Recording(seed, dt, players=players)
+        self.playback = playback.events if playback is not None else []
+        self.next_event = 0
+        self.ticks = 0
+
+        self.ball_class = ball_class
+        self.pin_class = pin_class
+        self.ball = ball_class(LANE_WIDTH // 2, LANE_HEIGHT - 50)
+        self.pins = self.setup_pins()
+        self.sim = LaneSimulation(self.ball, self.pins, deflect=True, pin_force=5, rng=self.rng,
+                                  pin_collisions=True, swept=True)
+        self.throw_finished = False
+
+        self.frame = 1
+        self.throw_number = 1
+        self.max_frames = 10
+        self.players = [Player(f"Player {number}", self.max_frames) for number in range(1, players + 1)]
+        self.player = 0  # Index of the player whose turn it is
+        self.game_over = False
+
+    @property
+    def throws_history(self):
+        return self.players[self.player].throws_history
+
+    @property
+    def score_keeper(self):
+        return self.players[self.player].score_keeper
+
+    @property
+    def scores(self):
+        return self.players[self.player].scores
+
+    @scores.setter
+    def scores(self, scores):
+        self.players[self.player].scores = scores
+
+    def new_game(self, seed=None):
+        """Start a fresh game on this lane, keeping its players' names"""
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.recording = Recording(seed, self.dt, players=len(self.players))
+        self.playback = []
+        self.next_event = 0
+        self.ticks = 0
+
+        self.reset_pins()
+        self.reset_ball()
+        self.throw_finished = self.sim.throw_finished = False
+
+        self.frame = 1
+        self.throw_number = 1
+        self.players = [Player(player.name, self.max_frames) for player in self.players]
+        self.player = 0
+        self.game_over = False
+
+    def setup_pins(self):
+        # Create a triangular formation of pins (4 rows)
+        return setup_pins(self.pin_class, LANE_WIDTH)
+
+    def reset_pins(self):
+        self.pins = self.setup_pins()
+        self.sim.pins = self.pins
+
+    def reset_ball(self):
+        self.ball.reset(LANE_WIDTH // 2, LANE_HEIGHT - 50)
+
+    def count_pins_hit(self):
+        # Knocked pins leave the list once they fly off-screen, so count on the simulation
+        return self.sim.knocked_down
+
+    def next_throw(self):
+        if self.players[self.player].add_throw(self.count_pins_hit(), self.throw_number):
+            self.end_frame()
+        else:
+            self.throw_number = 2
+
+        self.reset_ball()
+
+        # Check if game is over
+        if self.frame > self.max_frames:
+            self.game_over = True
+
+    def end_frame(self):
+        # Hand over to the next player; the frame is over once everyone has bowled it
+        self.throw_number = 1
+        self.reset_pins()
+        self.player += 1
+        if self.player == len(self.players):
+            self.player = 0
+            self.frame += 1
+
+    def calculate_score(self):
+        for player in self.players:
+            player.scores = player.score_keeper.settled_scores()
+
+    # Snapshots
+
+    def snapshot(self):
+        ball = self.ball
+        return Snapshot(self.seed, self.dt, self.frame, self.throw_number, self.player, self.game_over, self.ticks,
+                        self.next_event, tuple(self.recording.events), self.sim.knocked_down, self.throw_finished,
+                        tuple(player.snapshot() for player in self.players),
+                        (ball.x, ball.y, ball.prev_x, ball.prev_y, ball.velocity_x, ball.velocity_y,
+                         ball.moving, ball.power, ball.angle),
+                        tuple((pin.x, pin.y, pin.velocity_x, pin.velocity_y, pin.is_hit) for pin in self.pins),
+                        self.rng.getstate())
+
+    def restore(self, state):
+        """Return to a snapshot() of this lane, or of a lane with as many players and the same step
+
+        The ball, pins, players and score keepers are updated in place. The
+        game's seed and recording become the snapshot's, so the recording
+        still replays the game even if the snapshot came from an earlier one.
+        """
+        if len(state.players) != len(self.players):
+            raise ValueError(f"snapshot has {len(state.players)} players, lane has {len(self.players)}")
+        if state.dt != self.dt:
+            raise ValueError(f"snapshot steps {state.dt} frames, lane steps {self.dt}")
+        self.seed = self.recording.seed = state.seed
+        self.recording.events[:] = state.events
+        self.frame = state.frame
+        self.throw_number = state.throw_number
+        self.player = state.player
+        self.game_over = state.game_over
+        self.ticks = state.ticks
+        self.next_event = state.next_event
+        self.throw_finished = self.sim.throw_finished = state.throw_finished
+        for player, player_state in zip(self.players, state.players):
+            player.restore(player_state)
+
+        ball = self.ball
+        (ball.x, ball.y, ball.prev_x, ball.prev_y, ball.velocity_x, ball.velocity_y,
+         ball.moving, ball.power, ball.angle) = state.ball
+
+        # Pins that flew off since the snapshot come back as new objects
+        pins = self.pins
+        del pins[len(state.pins):]
+        while len(pins) < len(state.pins):
+            pins.append(self.pin_class(0, 0))
+        for pin, (x, y, velocity_x, velocity_y, is_hit) in zip(pins, state.pins):
+            pin.x = x
+            pin.y = y
+            pin.velocity_x = velocity_x
+            pin.velocity_y = velocity_y
+            pin.is_hit = is_hit
+        self.sim.pins = pins
+        self.sim.knocked_down = state.knocked_down
+
+        self.rng.setstate(state.rng)
+
+    def fork(self, branches, state=None):
+        """Headless lanes restored to state (by default the current one), one per branch
+
+        Each branch has its own RNG, recording and physics objects, so
+        branches can be played on independently of each other and this lane.
+        """
+        if state is None:
+            state = self.snapshot()
+        lanes = []
+        for _ in range(branches):
+            lane = BowlingLane(state.seed, state.dt, players=len(self.players))
+            for player, source in zip(lane.players, self.players):
+                player.name = source.name
+            lane.restore(state)
+            lanes.append(lane)
+        return lanes
+
+    # Input
+
+    def set_power(self, power):
+        if power != self.ball.power:
+            self.ball.power = power
+            self.recording.events.append((self.ticks, SET_POWER, power))
+
+    def set_angle(self, angle):
+        if angle != self.ball.angle:
+            self.ball.angle = angle
+            self.recording.events.append((self.ticks, SET_ANGLE, angle))
+
+    def throw(self):
+        if self.ball.moving or self.game_over:
+            return
+        self.ball.throw()
+        self.recording.events.append((self.ticks, THROW, 0))
+
+    def reseed(self, seed):
+        # Networked throws bring their own seed, so every client deflects alike
+        self.rng.seed(seed)
+        self.recording.events.append((self.ticks, SEED, seed))
+
+    def apply(self, opcode, value):
+        if opcode == SET_POWER:
+            self.set_power(int(value))
+        elif opcode == SET_ANGLE:
+            self.set_angle(value)
+        elif opcode == THROW:
+            self.throw()
+        elif opcode == SEED:
+            self.reseed(int(value))
+        else:
+            raise ValueError(f"Unknown input opcode {opcode}")
+
+    @property
+    def replaying(self):
+        return self.next_event < len(self.playback)
+
+    # Simulation
+
+    def step(self, dt=1):
+        """Apply any inputs due now, advance the lane one tick and score finished throws"""
+        while self.replaying and self.playback[self.next_event][0] <= self.ticks:
+            _, opcode, value = self.playback[self.next_event]
+            self.next_event += 1
+            self.apply(opcode, value)
+
+        hits = self.sim.step(dt)
+        self.ticks += 1
+        self.throw_finished = self.sim.throw_finished
+        if self.throw_finished and not self.game_over:
+            self.next_throw()
+            self.calculate_score()
+        return hits
+
+    def fast_forward(self):
+        """Play the rest of the playback as fast as possible
+
+        Ticks where nothing moves change nothing, so they are jumped over
+        straight to the next logged input.
+        """
+        while self.replaying or self.sim.busy():
+            if not self.sim.busy():
+                self.ticks = max(self.ticks, self.playback[self.next_event][0])
+            self.step(self.dt)
+
+def play_random_game(seed=None, dt=0.25):
+    """Play a whole game with random aims and return its lane, for testing replays"""
+    lane = BowlingLane(seed, dt)
+    aim = random.Random(lane.seed + 1)
+    while not lane.game_over:
+        lane.set_power(aim.randint(20, 50))
+        lane.set_angle(-math.pi / 2 + aim.randint(-4, 4) * 0.05)
+        lane.throw()
+        while lane.sim.busy():
+            lane.step(dt)
+        lane.ticks += aim.randint(0, 600)  # Time spent aiming
+    return lane
+
+def what_if(lane, aims):
+    """Play each (power, angle) from the lane's current state in its own branch; returns the pins each knocks down"""
+    results = []
+    for branch, (power, angle) in zip(lane.fork(len(aims)), aims):
+        branch.set_power(power)
+        branch.set_angle(angle)
+        branch.throw()
+        while branch.sim.busy():
+            branch.step(branch.dt)
+        results.append(branch.players[lane.player].throws_history[-1])  # The turn may have passed on
+    return results
+
+def benchmark_snapshots(count=10000, seed=0):
+    """Time snapshots and restores in the middle of a rolling throw, and forking"""
+    lane = BowlingLane(seed, 0.25)
+    lane.set_power(40)
+    lane.throw()
+    for _ in range(150):
+        lane.step(lane.dt)  # Ball among the pins, some of them flying
+    state = lane.snapshot()
+
+    start = time.perf_counter()
+    for _ in range(count):
+        lane.snapshot()
+    snapshot_time = (time.perf_counter() - start) / count
+    start = time.perf_counter()
+    for _ in range(count):
+        lane.restore(state)
+    restore_time = (time.perf_counter() - start) / count
+
+    # Restoring must resume exactly where the snapshot was taken
+    lane.restore(state)
+    lane.fast_forward()
+    expected = lane.throws_history[:]
+    lane.restore(state)
+    lane.fast_forward()
+    mismatches = lane.throws_history != expected
+
+    start = time.perf_counter()
+    branches = lane.fork(100, state)
+    fork_time = (time.perf_counter() - start) / len(branches)
+    print(f"snapshot {snapshot_time * 1e6:.1f} us, restore {restore_time * 1e6:.1f} us, "
+          f"fork {fork_time * 1e6:.0f} us per branch, {int(mismatches)} mismatches after restore")
+
+    aims = [(power, -math.pi / 2 + offset * 0.05) for power in (20, 35, 50) for offset in range(-4, 5)]
+    start = time.perf_counter()
+    results = what_if(BowlingLane(seed, 0.25), aims)
+    print(f"what-if of {len(aims)} first throws in {(time.perf_counter() - start) * 1000:.0f} ms: "
+          f"best knocks down {max(results)} pins")
+
+def benchmark(games=20, seed=0):
+    """Record random games, then check and time their headless replays"""
+    rng = random.Random(seed)
+    elapsed = 0
+    mismatches = 0
+    for _ in range(games):
+        played = play_random_game(rng.getrandbits(63))
+        start = time.perf_counter()
+        replayed = BowlingLane(playback=played.recording)
+        replayed.fast_forward()
+        elapsed += time.perf_counter() - start
+        mismatches += (replayed.throws_history, replayed.scores) != (played.throws_history, played.scores)
+    print(f"{games} games replayed, {mismatches} mismatches, {elapsed / games * 1000:.0f} ms per game")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "snapshots":
+        benchmark_snapshots()
+    elif len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        start = time.perf_counter()
+        lane = BowlingLane(playback=Recording.load(sys.argv[1]))
+        lane.fast_forward()
+        print(f"Replayed in {(time.perf_counter() - start) * 1000:.0f} ms")
+        print(f"Throws: {lane.throws_history}")
+        print(f"Scores: {lane.scores}, total {sum(lane.scores)}")
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
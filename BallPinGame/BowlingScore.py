@@ -0,0 +1,108 @@
+class ScoreKeeper:
+    """Incremental bowling scorer that updates in constant time per throw"""
+
+    def __init__(self, total_frames=10):
+        self.total_frames = total_frames
+        self.frame = 0  # Index of the frame being played
+        self.throw_in_frame = 0
+        self.pins = 10
+        self.frame_scores = [0] * total_frames  # Running score of each frame
+        self.frame_complete = [False] * total_frames
+        self.pending = []  # [frame index, bonus throws still owed]
+        self.frame_starts = []  # Throw index at which each frame started
+        self.tenth_throws = []
+        self.total = 0
+        self.throw_count = 0
+        self.game_over = False
+
+    def add_throw(self, knocked_down):
+        """Record a throw and update frame scores and bonuses"""
+        if self.game_over:
+            raise ValueError("game is already over")
+        if knocked_down < 0 or knocked_down > self.pins:
+            raise ValueError(f"cannot knock down {knocked_down} of {self.pins} pins")
+
+        if self.throw_in_frame == 0:
+            self.frame_starts.append(self.throw_count)
+        self.throw_count += 1
+        self.total += knocked_down
+
+        # Pay out bonuses owed by earlier strikes and spares (at most two)
+        if self.pending:
+            still_pending = []
+            for bonus in self.pending:
+                self.frame_scores[bonus[0]] += knocked_down
+                self.total += knocked_down
+                bonus[1] -= 1
+                if bonus[1] > 0:
+                    still_pending.append(bonus)
+                else:
+                    self.frame_complete[bonus[0]] = True
+            self.pending = still_pending
+
+        self.frame_scores[self.frame] += knocked_down
+
+        if self.frame == self.total_frames - 1:
+            self._add_final_frame_throw(knocked_down)
+        elif self.throw_in_frame == 0 and knocked_down == 10:
+            # Strike: 10 + next two throws
+            self.pending.append([self.frame, 2])
+            self._next_frame()
+        elif self.throw_in_frame == 0:
+            self.pins -= knocked_down
+            self.throw_in_frame = 1
+        else:
+            if knocked_down == self.pins:
+                # Spare: 10 + next throw
+                self.pending.append([self.frame, 1])
+            else:
+                self.frame_complete[self.frame] = True
+            self._next_frame()
+
+    def _add_final_frame_throw(self, knocked_down):
+        """Handle the bonus throw rules of the last frame"""
+        self.tenth_throws.append(knocked_down)
+        self.throw_in_frame += 1
+        self.pins -= knocked_down
+        if self.pins == 0:
+            self.pins = 10  # Reset pins for bonus throw
+
+        throws = self.tenth_throws
+        if len(throws) == 3 or (len(throws) == 2 and throws[0] + throws[1] < 10):
+            self.frame_complete[self.frame] = True
+            self.game_over = True
+
+    def _next_frame(self):
+        self.frame += 1
+        self.throw_in_frame = 0
+        self.pins = 10
+
+    def snapshot(self):
+        """The scoring state as tuples, for restore()"""
+        return (self.frame, self.throw_in_frame, self.pins, tuple(self.frame_scores), tuple(self.frame_complete),
+                tuple((frame, owed) for frame, owed in self.pending), tuple(self.frame_starts),
+                tuple(self.tenth_throws), self.total, self.throw_count, self.game_over)
+
+    def restore(self, state):
+        """Return to a snapshot(), reusing this keeper's lists"""
+        (self.frame, self.throw_in_frame, self.pins, frame_scores, frame_complete, pending, frame_starts,
+         tenth_throws, self.total, self.throw_count, self.game_over) = state
+        self.frame_scores[:] = frame_scores
+        self.frame_complete[:] = frame_complete
+        self.pending = [[frame, owed] for frame, owed in pending]
+        self.frame_starts[:] = frame_starts
+        self.tenth_throws[:] = tenth_throws
+
+    def running_totals(self):
+        """Return the cumulative score after each frame"""
+        totals = []
+        running = 0
+        for score in self.frame_scores:
+            running += score
+            totals.append(running)
+        return totals
+
+    def settled_scores(self):
+        """Return frame scores, with 0 for frames still waiting on throws"""
+        return [score if complete else 0
+                for score, complete in zip(self.frame_scores, self.frame_complete)]
@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+
+import pygame
+
+class DirtyRenderer:
+    """Redraws only the parts of the screen that changed since the last frame
+
+    The static background is drawn once into a cached surface. Each frame the
+    game passes its moving or changing items as (id, key, rect, draw) tuples
+    in drawing order: key is any value that changes whenever the item looks
+    different, rect bounds what draw() paints on the screen. An item is dirty
+    when it is new, gone, or its key or rect changed. Its old and new rects
+    are grown until they wholly contain every item they touch, restored from
+    the background, and those items are redrawn in order. Only those rects
+    are pushed with display.update(). Items are redrawn whole rather than
+    clipped because pygame draws thick outlines a pixel wide at clip edges.
+    """
+
+    def __init__(self, screen, draw_background):
+        self.screen = screen
+        self.bounds = screen.get_rect()
+        self.background = pygame.Surface(self.bounds.size).convert(screen)
+        draw_background(self.background)
+        self.full_redraw = True
+        self.drawn = {}  # id -> (key, rect) as last drawn
+        self.updated_area = 0  # Pixels pushed by the last render()
+
+    def invalidate(self):
+        """Redraw and push the whole screen next frame"""
+        self.full_redraw = True
+
+    def render(self, items):
+        drawn = {}
+        dirty = []
+        for item_id, key, rect, _ in items:
+            drawn[item_id] = (key, rect)
+            previous = self.drawn.get(item_id)
+            if previous is None:
+                dirty.append(rect)
+            elif previous != (key, rect):
+                dirty.append(previous[1])
+                dirty.append(rect)
+        for item_id, (_, rect) in self.drawn.items():
+            if item_id not in drawn:
+                dirty.append(rect)
+        self.drawn = drawn
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.screen.blit(self.background, (0, 0))
+            for _, _, _, draw in items:
+                draw()
+            self.present([self.bounds])
+            return [self.bounds]
+
+        rects = self._grow(dirty, [item_rect for _, _, item_rect, _ in items])
+        for rect in rects:
+            self.screen.blit(self.background, rect, rect)
+            for _, _, item_rect, draw in items:
+                if item_rect.colliderect(rect):
+                    draw()
+        self.present(rects)
+        return rects
+
+    def present(self, rects):
+        """Push rects of the screen to the display"""
+        if rects:
+            pygame.display.update(rects)
+        self.updated_area = sum(rect.width * rect.height for rect in rects)
+
+    def _grow(self, dirty, item_rects):
+        """Merge dirty rects and grow them over every item they touch"""
+        rects = _merge(dirty)
+        while True:
+            grown = []
+            for rect in rects:
+                touching = [item_rects[index] for index in rect.collidelistall(item_rects)]
+                grown.append(rect.unionall(touching) if touching else rect)
+            if grown == rects:
+                break
+            rects = _merge(grown)
+        return [clipped for clipped in (rect.clip(self.bounds) for rect in rects) if clipped.width and clipped.height]
+
+def _merge(rects):
+    """Union overlapping rects so no pixel is restored or pushed twice"""
+    merged = []
+    for rect in rects:
+        if not rect.width or not rect.height:
+            continue
+        rect = rect.copy()
+        overlapping = rect.collidelistall(merged)
+        while overlapping:
+            for index in reversed(overlapping):
+                rect.union_ip(merged.pop(index))
+            overlapping = rect.collidelistall(merged)
+        merged.append(rect)
+    return merged
+
+def benchmark(frames=600):
+    """Time full redraws against dirty rects for a resting and a rolling ball"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from BowlingGameVisual import BowlingGame
+
+    print(f"{'scene':>8} {'full':>9} {'dirty':>9} {'pixels pushed':>14}  (ms per frame)")
+    for scene in ("resting", "rolling"):
+        timings = []
+        for full in (True, False):
+            game = BowlingGame()
+            game.ball.power = 40
+            start = time.perf_counter()
+            area = 0
+            for frame in range(frames):
+                if scene == "rolling" and not game.sim.busy():
+                    game.reset_pins()
+                    game.reset_ball()
+                    game.ball.power = 40
+                    game.ball.throw()
+                game.timestep.advance(game.sim, 1 / 60)
+                if full:
+                    game.renderer.invalidate()
+                game.renderer.render(game.scene_items())
+                area += game.renderer.updated_area
+            timings.append((time.perf_counter() - start) / frames * 1000)
+        print(f"{scene:>8} {timings[0]:>9.3f} {timings[1]:>9.3f} {area / frames:>14,.0f}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
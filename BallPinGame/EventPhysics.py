@@ -0,0 +1,150 @@
+import math
+import random
+import sys
+import time
+
+from PinPhysics import FRICTION, GRAVITY, STOP_SPEED, LANE_WIDTH, LANE_HEIGHT, Ball, LaneSimulation, setup_pins
+
+LOG_FRICTION = math.log(FRICTION)
+
+# Closed-form positions agree with frame stepping to within this many pixels
+TOLERANCE = 1e-6
+
+def _frames_to_travel(distance, speed):
+    """Frames of friction-damped motion needed to cover a distance (may be fractional)"""
+    remaining = 1 - distance * (1 - FRICTION) / speed
+    if remaining <= 0:
+        return math.inf  # The ball stops first
+    return math.log(remaining) / LOG_FRICTION
+
+class EventSimulation(LaneSimulation):
+    """LaneSimulation that jumps straight from one event to the next
+
+    Between events the ball moves in a straight line and its speed falls by
+    FRICTION each frame, so its position after k frames has a closed form.
+    run_throw() finds the next frame that could stop the ball, bounce it off a
+    wall or touch a standing pin. It jumps over the frames before that
+    analytically and then runs the event frame with the normal step(), so
+    stops, bounces, hits and deflections follow exactly the same rules.
+    Positions match frame stepping within TOLERANCE pixels, so the same pins
+    fall unless the ball grazes a pin by less than that. With a step length
+    dt other than one frame, events are counted in steps and jumps cover
+    whole steps, so the event step is run exactly as a stepped run would.
+    """
+
+    def next_event(self, dt=1):
+        """Return how many steps of dt frames from now the next event can happen (at least 1)"""
+        ball = self.ball
+        if self.pin_collisions and any(pin.is_hit for pin in self.pins):
+            return 1  # Flying pins can hit other pins at any frame
+        speed = math.hypot(ball.velocity_x, ball.velocity_y)
+        fastest = max(abs(ball.velocity_x), abs(ball.velocity_y))
+        if fastest < STOP_SPEED / FRICTION ** dt:
+            return 1
+        frames = math.log(STOP_SPEED / fastest) / LOG_FRICTION
+
+        # Walls
+        for position, velocity, low, high in ((ball.x, ball.velocity_x, ball.radius, ball.width - ball.radius),
+                                              (ball.y, ball.velocity_y, ball.radius, ball.height - ball.radius)):
+            if velocity == 0:
+                continue
+            gap = high - position if velocity > 0 else position - low
+            if gap <= 0:
+                return 1
+            frames = min(frames, _frames_to_travel(gap, abs(velocity)))
+
+        # Pins along the ball's straight path
+        direction_x = ball.velocity_x / speed
+        direction_y = ball.velocity_y / speed
+        for pin in self.pins:
+            if pin.is_hit:
+                continue
+            offset_x = pin.x - ball.x
+            offset_y = pin.y - ball.y
+            along = offset_x * direction_x + offset_y * direction_y
+            reach = pin.radius + ball.radius
+            miss_squared = offset_x * offset_x + offset_y * offset_y - along * along
+            if miss_squared >= reach * reach:
+                continue
+            half_chord = math.sqrt(reach * reach - miss_squared)
+            if along + half_chord <= 0:
+                continue  # Pin is behind the ball
+            if along - half_chord <= TOLERANCE:
+                return 1  # Ball is passing the pin, step frame by frame
+            frames = min(frames, _frames_to_travel(along - half_chord - TOLERANCE, speed))
+
+        return max(1, int(frames / dt))
+
+    def advance(self, frames):
+        """Move the ball and falling pins over frames that contain no event
+
+        frames must be a whole number of steps: falling pins follow the same
+        closed form for any step length, but the ball only stops at the end
+        of a step.
+        """
+        if frames <= 0:
+            return
+        ball = self.ball
+        decay = FRICTION ** frames
+        travelled = (1 - decay) / (1 - FRICTION)
+        ball.x += ball.velocity_x * travelled
+        ball.y += ball.velocity_y * travelled
+        ball.velocity_x *= decay
+        ball.velocity_y *= decay
+
+        if self.pin_force is not None:
+            for pin in self.pins:
+                if pin.is_hit:
+                    pin.x += pin.velocity_x * frames
+                    pin.y += pin.velocity_y * frames + GRAVITY * frames * (frames - 1) / 2
+                    pin.velocity_y += GRAVITY * frames
+            self.pins[:] = [pin for pin in self.pins
+                            if not pin.is_hit or pin.y <= ball.height + pin.radius]
+
+    def run_throw(self, power, angle, max_steps=100000, dt=1):
+        """Throw the ball and resolve it event by event; returns the number of pins hit"""
+        self.ball.power = power
+        self.ball.angle = angle
+        self.ball.throw()
+
+        hit = 0
+        self.events = 0
+        steps = 0
+        while self.busy() and steps < max_steps:
+            skipped = min(self.next_event(dt), max_steps - steps)
+            self.advance((skipped - 1) * dt)
+            hit += len(self.step(dt))
+            steps += skipped
+            self.events += 1
+        return hit
+
+def compare(throws=2000, seed=0, dt=1, **rules):
+    """Check event-driven throws against stepping dt frames at a time with the given rules, and time both"""
+    rng = random.Random(seed)
+    cases = [(rng.randint(0, 50), rng.uniform(-math.pi, 0), rng.random()) for _ in range(throws)]
+    results = {}
+    for simulation_class in (LaneSimulation, EventSimulation):
+        outcomes = []
+        start = time.perf_counter()
+        for power, angle, throw_seed in cases:
+            ball = Ball(LANE_WIDTH // 2, LANE_HEIGHT - 50)
+            rack = setup_pins()
+            sim = simulation_class(ball, list(rack), rng=random.Random(throw_seed), **rules)
+            sim.run_throw(power, angle, dt=dt)
+            outcomes.append(([pin.is_hit for pin in rack], ball.x, ball.y))
+        results[simulation_class.__name__] = (outcomes, time.perf_counter() - start)
+
+    stepped, stepped_time = results["LaneSimulation"]
+    jumped, jumped_time = results["EventSimulation"]
+    same_pins = sum(a[0] == b[0] for a, b in zip(stepped, jumped))
+    drift = max(max(abs(a[1] - b[1]), abs(a[2] - b[2])) for a, b in zip(stepped, jumped) if a[0] == b[0])
+    print(f"Stepping:     {throws / stepped_time:,.0f} throws/s")
+    print(f"Event driven: {throws / jumped_time:,.0f} throws/s")
+    print(f"Same pins knocked in {same_pins}/{throws} throws, largest position gap {drift:.2e} px")
+
+if __name__ == "__main__":
+    throws = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("Ball only, 60 FPS frames:")
+    compare(throws)
+    print("The games' rules, 240 Hz steps:")
+    compare(throws, dt=0.25, pin_force=5, pin_collisions=True, swept=True)
@@ -0,0 +1,174 @@
+import csv
+import os
+import sys
+import time
+from collections import deque
+
+import pygame
+
+WHITE = (255, 255, 255)
+OVERLAY_COLOR = (0, 0, 0, 200)
+
+def _percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+class FrameProfiler:
+    """Times the phases of each frame over a rolling window of frames
+
+    The game loop calls start_frame(), then mark(name) as each phase of the
+    frame ends, then end_frame(). Methods listed in enable() are wrapped so
+    every call is timed as well; their time is also part of the marked phase
+    they run in. While disabled, mark() only checks a flag and nothing is
+    wrapped.
+    """
+
+    def __init__(self, window=600, refresh=15):
+        self.window = window
+        self.refresh = refresh  # Frames between overlay updates
+        self.enabled = False
+        self.frames = deque(maxlen=window)  # (frame number, total seconds, {phase: seconds})
+        self.frame_count = 0
+        self.overlay_lines = ()
+        self._wrapped = []
+        self._panel = None
+        self._phases = {}
+        self._start = 0.0
+        self._last = 0.0
+
+    def enable(self, targets=()):
+        """Start profiling; targets are (owner, method name, phase name) to time"""
+        self.enabled = True
+        self.frames.clear()
+        self.overlay_lines = ("Profiling...",)
+        self._phases.clear()
+        self._start = self._last = time.perf_counter()
+        for owner, attribute, name in targets:
+            self._wrap(owner, attribute, name)
+
+    def disable(self):
+        self.enabled = False
+        for owner, attribute, original in reversed(self._wrapped):
+            if original is None:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+        self._wrapped = []
+
+    def _wrap(self, owner, attribute, name):
+        method = getattr(owner, attribute)
+        phases = self._phases
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+        # On a class the wrapper is a plain function, so it still binds to
+        # instances. original is None unless owner defined the attribute
+        # itself, and disable() then deletes the wrapper instead
+        original = vars(owner).get(attribute)
+        setattr(owner, attribute, timed)
+        self._wrapped.append((owner, attribute, original))
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self._phases.clear()
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, name):
+        """End the phase called name, which started at the previous mark"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._phases[name] = self._phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.frame_count += 1
+        self.frames.append((self.frame_count, self._last - self._start, dict(self._phases)))
+        if self.frame_count % self.refresh == 0:
+            self.overlay_lines = self.report()
+
+    def stats(self):
+        """Return {phase: (p50, p95, p99)} in seconds, with the whole frame as "frame" """
+        samples = {"frame": sorted(total for _, total, _ in self.frames)}
+        for _, _, phases in self.frames:
+            for name, seconds in phases.items():
+                samples.setdefault(name, []).append(seconds)
+        return {name: tuple(_percentile(sorted(values), percent) for percent in (50, 95, 99))
+                for name, values in samples.items()}
+
+    def report(self):
+        """Lines of text for the overlay, slowest phases first"""
+        stats = self.stats()
+        lines = [f"{len(self.frames)} frames   p50 / p95 / p99 ms"]
+        for name, (p50, p95, p99) in sorted(stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<18}{p50 * 1000:6.2f}{p95 * 1000:7.2f}{p99 * 1000:7.2f}")
+        return tuple(lines)
+
+    def overlay_item(self, screen, font, topleft=(10, 100)):
+        """The overlay as an (id, key, rect, draw) item for DirtyRenderer"""
+        line_height = font.get_linesize()
+        rect = pygame.Rect(topleft, (300, line_height * len(self.overlay_lines) + 8))
+        return ("profiler", self.overlay_lines, rect, lambda: self.draw(screen, font, rect))
+
+    def draw(self, screen, font, rect):
+        if self._panel is None or self._panel.get_size() != rect.size:
+            self._panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self._panel.fill(OVERLAY_COLOR)
+        screen.blit(self._panel, rect)
+        y = rect.top + 4
+        for line in self.overlay_lines:
+            screen.blit(font.render(line, True, WHITE), (rect.left + 6, y))
+            y += font.get_linesize()
+
+    def dump(self, path):
+        """Write the window of per-phase timings to a CSV file"""
+        with open(path, "w", newline="") as trace_file:
+            writer = csv.writer(trace_file)
+            writer.writerow(["frame", "phase", "ms"])
+            for frame, total, phases in self.frames:
+                writer.writerow([frame, "frame", f"{total * 1000:.4f}"])
+                for name, seconds in phases.items():
+                    writer.writerow([frame, name, f"{seconds * 1000:.4f}"])
+        return path
+
+def benchmark(frames=600, marks=1000000):
+    """Measure the cost of disabled marks and of profiling the visual game"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from BowlingGameVisual import BowlingGame
+
+    profiler = FrameProfiler()
+    start = time.perf_counter()
+    for _ in range(marks):
+        profiler.mark("phase")
+    print(f"Disabled mark(): {(time.perf_counter() - start) / marks * 1e9:.0f} ns")
+
+    for label in ("disabled", "enabled"):
+        game = BowlingGame()
+        if label == "enabled":
+            game.toggle_profiler()
+        start = time.perf_counter()
+        for frame in range(frames):
+            if not game.sim.busy():
+                game.reset_pins()
+                game.ball.power = 40
+                game.ball.throw()
+            game.profiler.start_frame()
+            game.profiler.mark("events")
+            game.timestep.advance(game.sim, 1 / 60)
+            game.profiler.mark("physics")
+            game.renderer.render(game.scene_items())
+            game.profiler.mark("render")
+            game.profiler.end_frame()
+        print(f"Profiler {label}: {(time.perf_counter() - start) / frames * 1000:.3f} ms per frame")
+    print("\n".join(game.profiler.report()))
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
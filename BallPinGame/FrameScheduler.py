@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+import pygame
+
+class FrameScheduler:
+    """Paces a game loop: full frame rate while anything moves, asleep otherwise
+
+    When the game reports an idle scene, events() blocks in pygame.event.wait
+    until input arrives, the next timer is due or idle_timeout passes, so a
+    resting game uses almost no CPU. The time spent asleep is not passed on
+    to the physics: elapsed only covers the frames actually run. Timers added
+    with after() run from events() without blocking the loop.
+    """
+
+    def __init__(self, clock, fps=60, idle_timeout=1.0):
+        self.clock = clock
+        self.fps = fps
+        self.idle_timeout = idle_timeout  # Seconds; wake up at least this often
+        self.elapsed = 0.0  # Seconds the last frame took
+        self.idle_frames = 0
+        self.active_frames = 0
+        self._timers = []  # (due time, callback), soonest first
+
+    def after(self, delay, callback):
+        """Call callback from events() once delay seconds have passed"""
+        self._timers.append((time.perf_counter() + delay, callback))
+        self._timers.sort(key=_due_time)
+
+    def scheduled(self, callback):
+        return any(pending == callback for _, pending in self._timers)
+
+    def cancel(self, callback):
+        self._timers = [timer for timer in self._timers if timer[1] != callback]
+
+    def events(self, idle=False):
+        """Return this frame's events, first sleeping until something happens if idle"""
+        woken = []
+        if idle:
+            self.idle_frames += 1
+            timeout = self.idle_timeout
+            if self._timers:
+                timeout = min(timeout, self._timers[0][0] - time.perf_counter())
+            event = pygame.event.wait(max(int(timeout * 1000), 1))
+            if event.type != pygame.NOEVENT:
+                woken.append(event)
+
+            # Restart frame timing so the sleep does not reach the physics
+            self.clock.tick()
+            self.elapsed = 0.0
+        else:
+            self.active_frames += 1
+
+        now = time.perf_counter()
+        while self._timers and self._timers[0][0] <= now:
+            _, callback = self._timers.pop(0)
+            callback()
+        return woken + pygame.event.get()
+
+    def tick(self):
+        """End the frame, waiting as needed to hold the frame rate"""
+        self.elapsed = self.clock.tick(self.fps) / 1000
+        return self.elapsed
+
+def _due_time(timer):
+    return timer[0]
+
+def benchmark(seconds=3.0):
+    """Measure CPU use of the visual game while resting and while a ball rolls"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from BowlingGameVisual import BowlingGame
+
+    print(f"{'scene':>22} {'CPU':>6} {'frames/s':>9}")
+    for label, rolling, idle_aware, full_redraw in (("resting, full redraws", False, False, True),
+                                                    ("resting, 60 FPS", False, False, False),
+                                                    ("resting, idle-aware", False, True, False),
+                                                    ("rolling, idle-aware", True, True, False)):
+        game = BowlingGame()
+        frames = 0
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        while time.perf_counter() - wall_start < seconds:
+            if rolling and not game.sim.busy():
+                game.reset_pins()
+                game.ball.power = 40
+                game.ball.throw()
+            game.scheduler.events(idle=idle_aware and not game.sim.busy())
+            game.timestep.advance(game.sim, game.scheduler.elapsed)
+            if full_redraw:
+                game.renderer.invalidate()
+            game.renderer.render(game.scene_items())
+            game.scheduler.tick()
+            frames += 1
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        print(f"{label:>22} {cpu / wall:>6.1%} {frames / wall:>9.1f}")
+
+if __name__ == "__main__":
+    benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
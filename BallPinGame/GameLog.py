@@ -0,0 +1,257 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from BatchScoring import MAX_THROWS, score_games
+from BowlingScore import ScoreKeeper
+
+MAGIC = b"BPGL"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")  # Magic, version, record size
+
+PACKED_THROWS = (MAX_THROWS + 1) // 2  # Two 4-bit throws per byte
+
+# One 32-byte record per game. Throw 2i is the low nibble of byte i and
+# throw 2i + 1 the high nibble; slots after the last throw are 0
+RECORD = np.dtype([
+    ("seed", "<u8"),
+    ("total", "<u2"),
+    ("count", "u1"),  # Throws actually played
+    ("throws", "u1", (PACKED_THROWS,)),
+    ("frame_scores", "u1", (10,)),
+])
+
+def pack_throws(throws):
+    """Pack a (games x 21) array of pin counts into (games x 11) bytes of nibbles"""
+    throws = np.asarray(throws, dtype=np.uint8)
+    padded = np.zeros((throws.shape[0], 2 * PACKED_THROWS), dtype=np.uint8)
+    padded[:, :throws.shape[1]] = throws
+    return padded[:, 0::2] | (padded[:, 1::2] << 4)
+
+def unpack_throws(packed):
+    """Inverse of pack_throws: return the zero-padded (games x 21) throws"""
+    throws = np.empty((packed.shape[0], 2 * PACKED_THROWS), dtype=np.uint8)
+    throws[:, 0::2] = packed & 0x0F
+    throws[:, 1::2] = packed >> 4
+    return throws[:, :MAX_THROWS]
+
+def throw_counts(throws):
+    """Number of throws in each complete game of a zero-padded (games x 21) array"""
+    throws = np.asarray(throws)
+    games = throws.shape[0]
+    rows = np.arange(games)
+    index = np.zeros(games, dtype=np.intp)
+    for _ in range(9):
+        index += np.where(throws[rows, index] == 10, 1, 2)
+
+    # The final frame has a third throw after a strike or a spare
+    first = throws[rows, index].astype(np.int16)
+    second = throws[rows, index + 1]
+    return (index + 2 + (first + second >= 10)).astype(np.uint8)
+
+class GameLogWriter:
+    """Streams games into a game log, buffer_size records at a time
+
+    write() takes whole arrays of games, such as a chunk from
+    Simulation.simulate_games; add_game() takes one finished BowlingGame or
+    BowlingLane. Records are appended after a fixed header, so a log can be
+    reopened for reading at any time and holds every flushed game.
+    """
+
+    def __init__(self, path, buffer_size=1 << 16):
+        self.path = path
+        self.games = 0
+        self._buffer = np.zeros(buffer_size, dtype=RECORD)
+        self._buffered = 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+
+    def write(self, throws, frame_scores=None, seeds=0, counts=None):
+        """Append games from a zero-padded (games x 21) array of throws
+
+        frame_scores and counts are computed when not given. seeds is one
+        value or one per game.
+        """
+        throws = np.asarray(throws)
+        if frame_scores is None:
+            frame_scores = score_games(throws)[0]
+        if counts is None:
+            counts = throw_counts(throws)
+
+        records = np.zeros(throws.shape[0], dtype=RECORD)
+        records["seed"] = seeds
+        records["total"] = np.asarray(frame_scores).sum(axis=1)
+        records["count"] = counts
+        records["throws"] = pack_throws(throws)
+        records["frame_scores"] = frame_scores
+
+        # Large batches skip the buffer
+        if len(records) >= len(self._buffer):
+            self.flush()
+            self._file.write(records.data)
+        else:
+            if self._buffered + len(records) > len(self._buffer):
+                self.flush()
+            self._buffer[self._buffered:self._buffered + len(records)] = records
+            self._buffered += len(records)
+        self.games += len(records)
+
+    def add_game(self, game, seed=None):
+        """Append one finished game from BowlingGame or BowlingLane
+
+        Frame scores are computed from the throws, as write() does for a
+        batch. seed defaults to a BowlingLane's own seed, else 0.
+        """
+        if hasattr(game, "throws_history"):
+            throws = game.throws_history
+            if seed is None:
+                seed = game.seed
+        else:
+            throws = game.throws
+        padded = np.zeros((1, MAX_THROWS), dtype=np.uint8)
+        padded[0, :len(throws)] = throws
+        self.write(padded, seeds=0 if seed is None else seed, counts=[len(throws)])
+
+    def flush(self):
+        if self._buffered:
+            self._file.write(self._buffer[:self._buffered].data)
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class GameLog:
+    """Read-only, memory-mapped view of a game log
+
+    records, seeds, totals, counts, frame_scores and packed_throws are NumPy
+    views straight onto the mapped file, so opening a log of any size reads
+    nothing until the arrays are used. Only throws() copies, to unpack the
+    nibbles. Release the views before calling close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as log_file:
+            magic, version, record_size = HEADER.unpack(log_file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or record_size != RECORD.itemsize:
+                raise ValueError(f"{path} is not a version {VERSION} game log")
+            size = os.fstat(log_file.fileno()).st_size
+            self.games = (size - HEADER.size) // RECORD.itemsize
+            self._map = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) if self.games else None
+
+        if self._map is None:
+            self.records = np.zeros(0, dtype=RECORD)
+        else:
+            self.records = np.frombuffer(self._map, dtype=RECORD, count=self.games, offset=HEADER.size)
+        self.seeds = self.records["seed"]
+        self.totals = self.records["total"]
+        self.counts = self.records["count"]
+        self.frame_scores = self.records["frame_scores"]
+        self.packed_throws = self.records["throws"]
+
+    def __len__(self):
+        return self.games
+
+    def throws(self, start=0, stop=None):
+        """Unpack games [start, stop) into a zero-padded (games x 21) array"""
+        return unpack_throws(self.packed_throws[start:stop])
+
+    def chunks(self, chunk_size=1 << 18):
+        """Yield (start, throws) for consecutive blocks of games"""
+        for start in range(0, self.games, chunk_size):
+            yield start, self.throws(start, start + chunk_size)
+
+    def game(self, index):
+        """Throws of one game as the list the game classes keep"""
+        return self.throws(index, index + 1)[0, :self.counts[index]].tolist()
+
+    def rescore(self, chunk_size=1 << 18):
+        """Score every game again with score_games; returns (frame_scores, totals)"""
+        frame_scores = np.empty((self.games, 10), dtype=np.int16)
+        totals = np.empty(self.games, dtype=np.int32)
+        for start, throws in self.chunks(chunk_size):
+            stop = start + len(throws)
+            frame_scores[start:stop], totals[start:stop] = score_games(throws)
+        return frame_scores, totals
+
+    def score_keeper(self, index):
+        """Replay one game into the ScoreKeeper the interactive games score with"""
+        keeper = ScoreKeeper()
+        for knocked_down in self.game(index):
+            keeper.add_throw(knocked_down)
+        return keeper
+
+    def close(self):
+        del self.records, self.seeds, self.totals, self.counts, self.frame_scores, self.packed_throws
+        if self._map is not None:
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark(games=4_000_000, seed=0):
+    """Write simulated games to a log, then time mapping and re-scoring it"""
+    from Simulation import simulate_games
+
+    path = os.path.join(tempfile.mkdtemp(), "games.bpgl")
+    start = time.perf_counter()
+    sample = None
+    with GameLogWriter(path) as writer:
+        for throws, frame_scores, _ in simulate_games(games, seed):
+            sample = sample if sample is not None else (throws[:10_000], frame_scores[:10_000])
+            writer.write(throws, frame_scores, np.arange(writer.games, writer.games + len(throws)))
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    print(f"Wrote {games:,} games in {elapsed:.2f}s, {size / games:.0f} bytes per game")
+
+    # The same games as JSON lists, for comparison
+    throws, frame_scores = sample
+    counts = throw_counts(throws)
+    as_json = json.dumps([{"throws": row[:count].tolist(), "scores": scores.tolist()}
+                          for row, count, scores in zip(throws, counts, frame_scores)])
+    start = time.perf_counter()
+    json.loads(as_json)
+    json_rate = len(throws) / (time.perf_counter() - start)
+    print(f"JSON: {len(as_json) / len(throws):.0f} bytes per game, parsed at {json_rate:,.0f} games/s")
+
+    start = time.perf_counter()
+    with GameLog(path) as log:
+        print(f"Mapped {len(log):,} games in {(time.perf_counter() - start) * 1000:.2f} ms")
+        start = time.perf_counter()
+        frame_scores, totals = log.rescore()
+        elapsed = time.perf_counter() - start
+        mismatches = int(np.count_nonzero(totals != log.totals))
+        mismatches += sum(log.score_keeper(index).frame_scores != log.frame_scores[index].tolist()
+                          for index in range(min(games, 1000)))
+        print(f"Re-scored at {games / elapsed:,.0f} games/s, {mismatches} mismatches")
+        del frame_scores, totals
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        with GameLog(sys.argv[1]) as log:
+            frame_scores, totals = log.rescore()
+            print(f"{len(log):,} games, mean score {log.totals.mean():.2f}, "
+                  f"{np.count_nonzero(totals != log.totals)} re-scoring mismatches")
+            del frame_scores, totals
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 4_000_000)
@@ -0,0 +1,255 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from BatchPhysics import BatchLaneSimulation
+from BowlingLane import Player
+from DirtyRenderer import DirtyRenderer
+from PinPhysics import LANE_WIDTH, LANE_HEIGHT
+from Startup import font, init_display
+from SurfaceCache import SurfaceCache
+
+# Constants
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+FPS = 60
+STEP_RATE = 240  # Physics steps per second, as in the single-lane game
+HEADER_HEIGHT = 16  # Text strip above each lane
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+BLUE = (0, 0, 255)
+BROWN = (139, 69, 19)
+BEIGE = (245, 245, 220)
+GRAY = (200, 200, 200)
+
+surfaces = SurfaceCache()
+
+def grid_layout(lanes, width, height):
+    """Columns, rows and tile size that show every lane as large as possible"""
+    best = None
+    for columns in range(1, lanes + 1):
+        rows = math.ceil(lanes / columns)
+        scale = min(width / columns / LANE_WIDTH, (height / rows - HEADER_HEIGHT) / LANE_HEIGHT)
+        if best is None or scale > best[2]:
+            best = (columns, rows, scale)
+    return best
+
+class LaneScore:
+    """Frame, throw and score of one lane, fed with the pins down after each throw"""
+
+    def __init__(self, number, max_frames=10):
+        self.number = number
+        self.max_frames = max_frames
+        self.new_game()
+
+    def new_game(self):
+        self.frame = 1
+        self.throw_number = 1
+        self.player = Player(f"Lane {self.number}", self.max_frames)
+        self.game_over = False
+
+    def throw_finished(self, pins_hit):
+        """Score a throw that left pins_hit pins down in total; returns True if the rack resets"""
+        frame_over = self.player.add_throw(pins_hit, self.throw_number)
+        self.player.scores = self.player.score_keeper.settled_scores()
+        if not frame_over:
+            self.throw_number = 2
+            return False
+        self.throw_number = 1
+        self.frame += 1
+        self.game_over = self.frame > self.max_frames
+        return True
+
+class MultiLaneGame:
+    """Many independent lanes, simulated in one batch and drawn as tiles of one window
+
+    Every lane keeps its own frame, throw and score, and a bowler on each lane
+    aims and throws by itself after a random pause, starting a new game after
+    the last frame. All lanes share one BatchLaneSimulation stepped at
+    STEP_RATE. Each lane is one DirtyRenderer item covering its tile, so only
+    tiles where something moved or a score changed are redrawn and pushed.
+    """
+
+    def __init__(self, lanes=32, seed=None, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        init_display()
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(f"Bowling - {lanes} lanes")
+        self.clock = pygame.time.Clock()
+        self.lanes = lanes
+        self.rng = np.random.default_rng(seed)
+        self.sim = BatchLaneSimulation(lanes, rng=self.rng)
+        self.dt = 60 / STEP_RATE
+        self.accumulator = 0.0
+        self.scores = [LaneScore(number) for number in range(1, lanes + 1)]
+        self.wait = self.rng.uniform(30, 120, lanes)  # Frames until each bowler throws
+
+        self.columns, self.rows, self.scale = grid_layout(lanes, *size)
+        self.tile_width = int(LANE_WIDTH * self.scale)
+        self.tile_height = int(LANE_HEIGHT * self.scale) + HEADER_HEIGHT
+        self.tiles = [pygame.Rect((index % self.columns) * self.tile_width, (index // self.columns) * self.tile_height,
+                                  self.tile_width, self.tile_height) for index in range(lanes)]
+        self.font = font(HEADER_HEIGHT + 2)
+        self.pin_radius = max(int(self.sim.pin_radius * self.scale), 1)
+        self.ball_radius = max(int(self.sim.ball_radius * self.scale), 1)
+
+        self.renderer = DirtyRenderer(self.screen, self.draw_background)
+
+    def draw_background(self, surface):
+        # Every tile's lane, drawn once and cached by the renderer
+        surface.fill(BLACK)
+        lane = pygame.transform.smoothscale(self.render_lane(), (self.tile_width, self.tile_height - HEADER_HEIGHT))
+        for tile in self.tiles:
+            surface.blit(lane, (tile.left, tile.top + HEADER_HEIGHT))
+
+    def render_lane(self):
+        lane = pygame.Surface((LANE_WIDTH, LANE_HEIGHT))
+        lane.fill(BLACK)
+        pygame.draw.rect(lane, BEIGE, (100, 50, LANE_WIDTH - 200, LANE_HEIGHT - 100))
+        pygame.draw.rect(lane, BROWN, (100, 50, LANE_WIDTH - 200, LANE_HEIGHT - 100), 10)
+        pygame.draw.rect(lane, BLACK, (90, 50, 10, LANE_HEIGHT - 100))
+        pygame.draw.rect(lane, BLACK, (LANE_WIDTH - 100, 50, 10, LANE_HEIGHT - 100))
+        return lane
+
+    def bowl(self, frames):
+        # Bowlers whose pause is over throw with a random aim
+        sim = self.sim
+        busy = sim.busy()
+        ready = ~busy & np.array([not score.game_over for score in self.scores])
+        self.wait[ready] -= frames
+        throwing = ready & (self.wait <= 0)
+        if throwing.any():
+            count = int(throwing.sum())
+            power = self.rng.integers(25, 51, count)
+            angle = -math.pi / 2 + self.rng.integers(-6, 7, count) * 0.05
+            powers = np.zeros(self.lanes)
+            angles = np.zeros(self.lanes)
+            powers[throwing] = power
+            angles[throwing] = angle
+            sim.throw(powers, angles, throwing)
+            self.wait[throwing] = self.rng.uniform(30, 120, count)
+
+        # Finished games start over after the pause
+        for index, score in enumerate(self.scores):
+            if score.game_over and not busy[index]:
+                self.wait[index] -= frames
+                if self.wait[index] <= 0:
+                    score.new_game()
+                    sim.reset_pins(index)
+                    self.wait[index] = self.rng.uniform(60, 180)
+
+    def advance(self, elapsed):
+        """Step every lane at STEP_RATE for elapsed seconds and score finished throws"""
+        self.accumulator += min(elapsed, 0.25)
+        finished = np.zeros(self.lanes, dtype=bool)
+        while self.accumulator >= 1 / STEP_RATE:
+            self.accumulator -= 1 / STEP_RATE
+            self.sim.step(self.dt)
+            finished |= self.sim.throw_finished
+
+        for index in np.nonzero(finished)[0]:
+            if self.scores[index].throw_finished(int(self.sim.knocked_down[index])):
+                self.sim.reset_pins(index)
+            self.sim.reset_ball(index)
+
+    def scene_items(self):
+        # One item per lane; its key changes whenever anything on the lane moves
+        sim = self.sim
+        scale = self.scale
+        pin_x = (sim.pin_x * scale).astype(np.int32)
+        pin_y = (sim.pin_y * scale).astype(np.int32)
+        ball_x = (sim.ball_x * scale).astype(np.int32)
+        ball_y = (sim.ball_y * scale).astype(np.int32)
+        shown = sim.present & (pin_y < self.tile_height - HEADER_HEIGHT + self.pin_radius)
+        items = []
+        for index, tile in enumerate(self.tiles):
+            score = self.scores[index]
+            key = (pin_x[index].tobytes(), pin_y[index].tobytes(), shown[index].tobytes(), sim.is_hit[index].tobytes(),
+                   int(ball_x[index]), int(ball_y[index]), score.frame, sum(score.player.scores), score.game_over)
+            draw = self.lane_drawer(index, tile, pin_x[index], pin_y[index], shown[index], ball_x[index], ball_y[index])
+            items.append((index, key, tile, draw))
+        return items
+
+    def lane_drawer(self, index, tile, pin_x, pin_y, shown, ball_x, ball_y):
+        def draw():
+            self.draw_lane_contents(index, tile, pin_x, pin_y, shown, ball_x, ball_y)
+        return draw
+
+    def draw_lane_contents(self, index, tile, pin_x, pin_y, shown, ball_x, ball_y):
+        # Drawn through a subsurface so nothing spills into the next tile
+        surface = self.screen.subsurface(tile)
+        top = HEADER_HEIGHT
+        pin_radius = self.pin_radius
+        standing_sprite = surfaces.circle(pin_radius, WHITE)
+        outline = surfaces.circle(pin_radius, BLACK, 1)
+        falling_sprite = surfaces.circle(pin_radius, GRAY)
+        for x, y, on_lane, hit in zip(pin_x, pin_y, shown, self.sim.is_hit[index]):
+            if on_lane:
+                corner = (x - pin_radius, y - pin_radius + top)
+                if hit:
+                    surface.blit(falling_sprite, corner)
+                else:
+                    surface.blit(standing_sprite, corner)
+                    surface.blit(outline, corner)
+
+        ball_radius = self.ball_radius
+        surface.blit(surfaces.circle(ball_radius, BLUE), (ball_x - ball_radius, ball_y - ball_radius + top))
+
+        score = self.scores[index]
+        status = "Final" if score.game_over else f"F{score.frame}"
+        text = surfaces.text(self.font, f"{score.player.name}  {status}  {sum(score.player.scores)}", WHITE)
+        surface.blit(text, (4, 1))
+
+    def run(self):
+        running = True
+        elapsed = 0.0
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key in (pygame.K_ESCAPE, pygame.K_q):
+                    running = False
+
+            self.bowl(elapsed * 60)
+            self.advance(elapsed)
+            self.renderer.render(self.scene_items())
+            elapsed = self.clock.tick(FPS) / 1000
+
+        pygame.quit()
+        sys.exit()
+
+def benchmark(lane_counts=(8, 16, 32, 64), frames=600, seed=0):
+    """Time physics and drawing per frame for growing numbers of lanes"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    print(f"{'lanes':>6} {'physics':>9} {'render':>9} {'frame':>9} {'max FPS':>9}  (ms per frame)")
+    for lanes in lane_counts:
+        game = MultiLaneGame(lanes, seed)
+        physics = render = 0.0
+        for _ in range(frames):
+            start = time.perf_counter()
+            game.bowl(1)
+            game.advance(1 / FPS)
+            middle = time.perf_counter()
+            game.renderer.render(game.scene_items())
+            end = time.perf_counter()
+            physics += middle - start
+            render += end - middle
+        total = (physics + render) / frames
+        print(f"{lanes:>6} {physics / frames * 1000:>9.3f} {render / frames * 1000:>9.3f} "
+              f"{total * 1000:>9.3f} {1 / total:>9.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Many bowling lanes in one window")
+    parser.add_argument("--lanes", type=int, default=32)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--benchmark", action="store_true", help="time frames for 8 to 64 lanes and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        MultiLaneGame(args.lanes, args.seed).run()
@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import collections
+import json
+import math
+import random
+import statistics
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from BowlingLane import BowlingLane
+from PinPhysics import FixedTimestep
+
+# Messages; every one starts with its type byte
+START = struct.Struct("<BBB")  # Type, players in the room, seat of the receiver
+THROW = struct.Struct("<BBBdI")  # Type, seat, power, angle, deflection seed
+START_MESSAGE = 1
+THROW_MESSAGE = 2
+
+DT = FixedTimestep(rate=240).dt  # Every client steps the lane as the visual game does
+
+class RelayServer:
+    """Groups connections into rooms and echoes each throw to the whole room
+
+    The server knows nothing about bowling. Connections are seated in the
+    order they arrive, and a room starts once it has players seats filled.
+    Each throw a client sends is stamped with the sender's seat and written
+    to every client in the room, the sender included, in the order received.
+    That order is the lockstep: clients only play throws the relay echoes.
+    When anyone leaves, the rest of the room is disconnected.
+    """
+
+    def __init__(self, players=2):
+        self.players = players
+        self.waiting = []  # Writers of the room being filled
+
+    async def handle(self, reader, writer):
+        room = self.waiting
+        seat = len(room)
+        room.append(writer)
+        if len(room) == self.players:
+            self.waiting = []
+            for index, member in enumerate(room):
+                member.write(START.pack(START_MESSAGE, self.players, index))
+
+        try:
+            while True:
+                data = bytearray(await reader.readexactly(THROW.size))
+                if data[0] != THROW_MESSAGE or len(room) < self.players:
+                    continue
+                data[1] = seat
+                for member in room:
+                    member.write(data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # Seats are never reused, so a room that loses anyone is closed
+            if room is self.waiting:
+                self.waiting = []
+            for member in room:
+                member.close()
+
+class LockstepClient:
+    """One seat in a relay room, over asyncio streams"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.players = 0
+        self.seat = 0
+
+    async def connect(self, host, port):
+        """Connect and wait for the room to fill"""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        _, self.players, self.seat = START.unpack(await self.reader.readexactly(START.size))
+
+    def send_throw(self, power, angle, seed):
+        self.writer.write(THROW.pack(THROW_MESSAGE, self.seat, power, angle, seed))
+
+    async def receive(self):
+        """Next relayed throw as (seat, power, angle, seed), or None once the room closed"""
+        try:
+            _, seat, power, angle, seed = THROW.unpack(await self.reader.readexactly(THROW.size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return seat, power, angle, seed
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+class ThreadedClient:
+    """A LockstepClient run in a background thread, for a synchronous game loop
+
+    connect() blocks until the room has filled. Relayed throws are appended
+    to throws as they arrive, and on_receive() is called from the network
+    thread after each one so a sleeping loop can wake up.
+    """
+
+    def __init__(self, host, port, on_receive=None):
+        self.client = LockstepClient()
+        self.on_receive = on_receive
+        self.throws = collections.deque()
+        self.closed = False
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.client.connect(host, port), self.loop).result()
+        asyncio.run_coroutine_threadsafe(self._receive(), self.loop)
+
+    @property
+    def players(self):
+        return self.client.players
+
+    @property
+    def seat(self):
+        return self.client.seat
+
+    def send_throw(self, power, angle, seed):
+        self.loop.call_soon_threadsafe(self.client.send_throw, power, angle, seed)
+
+    async def _receive(self):
+        while True:
+            message = await self.client.receive()
+            if message is None:
+                self.closed = True
+            else:
+                self.throws.append(message)
+            if self.on_receive is not None:
+                self.on_receive()
+            if message is None:
+                return
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.client.close)
+
+def apply_throw(lane, seat, power, angle, seed):
+    """Play a relayed throw on lane if it is seat's turn; returns whether it was played
+
+    The lane must be at rest. Every client applies the same relayed throws in
+    the same order to the same rules, so their lanes stay identical.
+    """
+    if seat != lane.player or lane.game_over or lane.sim.busy():
+        return False
+    lane.reseed(seed)
+    lane.set_power(power)
+    lane.set_angle(angle)
+    lane.throw()
+    return True
+
+async def play_bot(host, port, seed=None):
+    """Play one whole game in a room with random aims, headless; returns (lane, seat)
+
+    Each relayed throw is played out at once, so bots keep up with any room.
+    """
+    client = LockstepClient()
+    await client.connect(host, port)
+    lane = BowlingLane(dt=DT, players=client.players)
+    aim = random.Random(seed)
+    try:
+        while not lane.game_over:
+            if lane.player == client.seat:
+                client.send_throw(aim.randint(20, 50), -math.pi / 2 + aim.randint(-4, 4) * 0.05, aim.getrandbits(32))
+            message = await client.receive()
+            if message is None:
+                break
+            apply_throw(lane, *message)
+            while lane.sim.busy():
+                lane.step(lane.dt)
+    finally:
+        client.close()
+    return lane, client.seat
+
+async def run_server(host, port, players):
+    server = await asyncio.start_server(RelayServer(players).handle, host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"Relay listening on {host}:{port}, {players} players per room", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def start_server_process(players):
+    """Run a relay in a child process on a free localhost port; returns (process, port)"""
+    process = subprocess.Popen([sys.executable, __file__, "server", "--port", "0", "--players", str(players)],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    return process, parse_address(line.split()[3].rstrip(","))[1]
+
+def check(rooms=4, players=2):
+    """Play whole games with one process per client and check every room agrees"""
+    server, port = start_server_process(players)
+    try:
+        start = time.perf_counter()
+        clients = [subprocess.Popen([sys.executable, __file__, "bot", f"127.0.0.1:{port}", "--seed", str(index)],
+                                    stdout=subprocess.PIPE, text=True)
+                   for index in range(rooms * players)]
+        results = [json.loads(client.communicate()[0]) for client in clients]
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+
+    # A room's clients see the same throws and scores, whatever seats they had
+    games = collections.defaultdict(list)
+    for result in results:
+        games[json.dumps(result["players"])].append(result["seat"])
+    agreed = sum(sorted(seats) == list(range(players)) for seats in games.values())
+    print(f"{rooms} rooms of {players} client processes: {agreed} of {rooms} rooms agree on every throw "
+          f"({elapsed:.1f} s)")
+    return agreed == rooms
+
+async def flood(host, port, clients, throws):
+    """Clients that each send throws one at a time, timing the echo of their own"""
+    async def client_loop(client):
+        round_trips = []
+        for _ in range(throws):
+            sent = time.perf_counter()
+            client.send_throw(0, 0.0, 0)
+            while True:
+                message = await client.receive()
+                if message is None or message[0] == client.seat:
+                    break
+            round_trips.append(time.perf_counter() - sent)
+        return round_trips
+
+    connected = [LockstepClient() for _ in range(clients)]
+    await asyncio.gather(*(client.connect(host, port) for client in connected))
+    start = time.perf_counter()
+    round_trips = await asyncio.gather(*(client_loop(client) for client in connected))
+    elapsed = time.perf_counter() - start
+    for client in connected:
+        client.close()
+    return [trip for trips in round_trips for trip in trips], elapsed
+
+def benchmark(clients=200, players=4, throws=100):
+    """Round-trip latency and relay throughput with many clients on localhost"""
+    clients -= clients % players
+    server, port = start_server_process(players)
+    try:
+        round_trips, elapsed = asyncio.run(flood("127.0.0.1", port, clients, throws))
+    finally:
+        server.terminate()
+
+    # Every echo of a throw is delivered to the whole room
+    delivered = clients * throws * players
+    quantiles = statistics.quantiles(round_trips, n=100)
+    print(f"{clients} clients in rooms of {players}, {throws} throws each, {THROW.size} bytes per throw")
+    print(f"round trip: p50 {quantiles[49] * 1000:.2f} ms, p99 {quantiles[98] * 1000:.2f} ms")
+    print(f"relay: {clients * throws / elapsed:,.0f} throws/s in, {delivered / elapsed:,.0f} messages/s out, "
+          f"{delivered * THROW.size / elapsed / 1e6:.1f} MB/s")
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lockstep multiplayer relay for the visual bowling game")
+    commands = parser.add_subparsers(dest="command", required=True)
+    server_parser = commands.add_parser("server", help="run a relay")
+    server_parser.add_argument("--host", default="127.0.0.1")
+    server_parser.add_argument("--port", type=int, default=7878)
+    server_parser.add_argument("--players", type=int, default=2, help="players per room")
+    bot_parser = commands.add_parser("bot", help="play one game headless and print its throws as JSON")
+    bot_parser.add_argument("address", metavar="HOST:PORT")
+    bot_parser.add_argument("--seed", type=int)
+    check_parser = commands.add_parser("check", help="play games with a process per client and compare them")
+    check_parser.add_argument("--rooms", type=int, default=4)
+    check_parser.add_argument("--players", type=int, default=2)
+    benchmark_parser = commands.add_parser("benchmark", help="measure latency and relay throughput")
+    benchmark_parser.add_argument("--clients", type=int, default=200)
+    benchmark_parser.add_argument("--players", type=int, default=4)
+    benchmark_parser.add_argument("--throws", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == "server":
+        asyncio.run(run_server(args.host, args.port, args.players))
+    elif args.command == "bot":
+        lane, seat = asyncio.run(play_bot(*parse_address(args.address), args.seed))
+        print(json.dumps({"seat": seat, "players": [player.throws_history for player in lane.players]}))
+    elif args.command == "check":
+        sys.exit(0 if check(args.rooms, args.players) else 1)
+    else:
+        benchmark(args.clients, args.players, args.throws)
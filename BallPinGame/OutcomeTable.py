@@ -0,0 +1,166 @@
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from PinPhysics import LANE_WIDTH, LANE_HEIGHT, PHYSICS_VERSION, Ball, FixedTimestep, setup_pins
+from EventPhysics import EventSimulation
+
+MAGIC = b"BPOT"
+VERSION = 3
+HEADER = struct.Struct("<4sHHHHH2x")  # Magic, format version, physics version, powers, angles, seeds
+MAX_POWER = 50
+ANGLE_STEP = 0.05
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outcomes.bin")
+DT = FixedTimestep(rate=240).dt  # Cells are stepped as the visual games step the lane
+
+# The aim starts pointing up the lane and moves in ANGLE_STEP steps, but is
+# clamped at -pi and 0, so reachable angles lie on three offset lattices of
+# (anchor, first step, count): angle = anchor + (first + i) * ANGLE_STEP
+LATTICES = (
+    (-math.pi / 2, -31, 63),
+    (-math.pi, 0, 63),
+    (0.0, -62, 63),
+)
+
+def table_angles():
+    """Every angle reachable with the arrow keys, lattice by lattice"""
+    return [anchor + (first + i) * ANGLE_STEP
+            for anchor, first, count in LATTICES
+            for i in range(count)]
+
+def record_dtype(seeds):
+    return np.dtype([("mask", "<u2"), ("x", "<f4"), ("y", "<f4"), ("seed_masks", "<u2", (seeds,))])
+
+def pins_mask(pins):
+    """Pack the hit flags of a rack into a bitmask, pin i in bit i"""
+    mask = 0
+    for index, pin in enumerate(pins):
+        if pin.is_hit:
+            mask |= 1 << index
+    return mask
+
+def simulate_cell(power, angle, rng=None):
+    """Resolve one throw from the start position against a full rack, under the games' rules"""
+    ball = Ball(LANE_WIDTH // 2, LANE_HEIGHT - 50)
+    pins = setup_pins()
+
+    # Knocked pins fly off and are dropped from the simulation once off the lane
+    sim = EventSimulation(ball, list(pins), deflect=rng is not None, pin_force=5, rng=rng,
+                          pin_collisions=True, swept=True)
+    sim.run_throw(power, angle, dt=DT)
+    return pins_mask(pins), ball.x, ball.y
+
+def build_table(path=DEFAULT_PATH, seeds=8):
+    """Sweep every (power, angle) cell and write the outcome table"""
+    angles = table_angles()
+    records = np.zeros((MAX_POWER + 1) * len(angles), dtype=record_dtype(seeds))
+    for power in range(MAX_POWER + 1):
+        for index, angle in enumerate(angles):
+            record = records[power * len(angles) + index]
+            record["mask"], record["x"], record["y"] = simulate_cell(power, angle)
+
+            # Distribution of outcomes under random deflection, from a fixed seed set
+            for seed in range(seeds):
+                record["seed_masks"][seed] = simulate_cell(power, angle, random.Random(seed))[0]
+
+    with open(path, "wb") as table_file:
+        table_file.write(HEADER.pack(MAGIC, VERSION, PHYSICS_VERSION, MAX_POWER + 1, len(angles), seeds))
+        table_file.write(np.asarray(angles, dtype="<f8").tobytes())
+        table_file.write(records.tobytes())
+
+class OutcomeTable:
+    """Memory-mapped (power, angle) -> outcome lookup built by build_table()"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, physics, powers, angles, seeds = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} outcome table")
+        if physics != PHYSICS_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} was built for physics version {physics}, not {PHYSICS_VERSION}; rebuild it")
+        self.powers = powers
+        self.seeds = seeds
+        self.angles = np.frombuffer(self._map, dtype="<f8", count=angles, offset=HEADER.size)
+        self.records = np.frombuffer(self._map, dtype=record_dtype(seeds), count=powers * angles,
+                                     offset=HEADER.size + self.angles.nbytes)
+
+    def angle_index(self, angle):
+        """Index of the table angle matching an aim, or the nearest one"""
+        best = None
+        start = 0
+        for anchor, first, count in LATTICES:
+            i = min(max(round((angle - anchor) / ANGLE_STEP) - first, 0), count - 1)
+            error = abs(self.angles[start + i] - angle)
+            if error < 1e-6:
+                return start + i
+            if best is None or error < best[0]:
+                best = (error, start + i)
+            start += count
+        return best[1]
+
+    def _record(self, power, angle):
+        power = min(max(int(power), 0), self.powers - 1)
+        return self.records[power * len(self.angles) + self.angle_index(angle)]
+
+    def lookup(self, power, angle):
+        """Return (pins mask, final x, final y) of a throw without deflection"""
+        record = self._record(power, angle)
+        return int(record["mask"]), float(record["x"]), float(record["y"])
+
+    def distribution(self, power, angle):
+        """Return the pins masks of a throw under each stored deflection seed"""
+        return self._record(power, angle)["seed_masks"]
+
+    def close(self):
+        del self.angles, self.records
+        self._map.close()
+
+def benchmark(path=DEFAULT_PATH, lookups=100000):
+    """Build the table if missing or out of date, then time loading and lookups"""
+    try:
+        OutcomeTable(path).close()
+        current = True
+    except (FileNotFoundError, ValueError):
+        current = False
+    if not current:
+        start = time.perf_counter()
+        build_table(path)
+        print(f"Built {path} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    table = OutcomeTable(path)
+    print(f"Loaded {os.path.getsize(path):,} bytes in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    rng = random.Random(0)
+    queries = [(rng.randint(0, MAX_POWER), -math.pi / 2 + rng.randint(-31, 31) * ANGLE_STEP)
+               for _ in range(lookups)]
+    start = time.perf_counter()
+    for power, angle in queries:
+        table.lookup(power, angle)
+    elapsed = time.perf_counter() - start
+    print(f"{lookups / elapsed:,.0f} lookups/s")
+
+    # Spot-check stored outcomes against fresh simulations
+    mismatches = sum(table.lookup(power, angle)[0] != simulate_cell(power, angle)[0]
+                     for power, angle in queries[:500])
+    print(f"{mismatches} mismatches in 500 spot checks")
+    table.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH
+        start = time.perf_counter()
+        build_table(path)
+        print(f"Built {path} in {time.perf_counter() - start:.1f}s")
+    else:
+        benchmark(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
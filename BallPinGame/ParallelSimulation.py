@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from BatchScoring import MAX_THROWS, score_games
+from Simulation import simulate_throws
+
+BLOCK_SIZE = 1 << 16
+
+class SharedResults:
+    """Throws and totals of a parallel run, backed by shared memory"""
+
+    def __init__(self, games, create=True, names=None):
+        self.games = games
+        if create:
+            self._throws_memory = shared_memory.SharedMemory(create=True, size=max(games * MAX_THROWS, 1))
+            self._totals_memory = shared_memory.SharedMemory(create=True, size=max(games * 2, 1))
+        else:
+            self._throws_memory = shared_memory.SharedMemory(name=names[0])
+            self._totals_memory = shared_memory.SharedMemory(name=names[1])
+        self._owner = create
+
+        self.throws = np.ndarray((games, MAX_THROWS), dtype=np.uint8, buffer=self._throws_memory.buf)
+        self.totals = np.ndarray(games, dtype=np.int16, buffer=self._totals_memory.buf)
+
+    @property
+    def names(self):
+        return self._throws_memory.name, self._totals_memory.name
+
+    def close(self):
+        """Release the views and, for the creating process, the memory itself"""
+        del self.throws, self.totals
+        self._throws_memory.close()
+        self._totals_memory.close()
+        if self._owner:
+            self._throws_memory.unlink()
+            self._totals_memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _simulate_block(names, games, start, size, seed_sequence):
+    """Worker: simulate one block of games straight into shared memory"""
+    results = SharedResults(games, create=False, names=names)
+    try:
+        rng = np.random.default_rng(seed_sequence)
+        throws = simulate_throws(rng.random((size, MAX_THROWS)))
+        results.throws[start:start + size] = throws
+        results.totals[start:start + size] = score_games(throws)[1]
+    finally:
+        results.close()
+    return size
+
+def simulate_parallel(games, seed=None, workers=None, block_size=BLOCK_SIZE):
+    """Simulate games across a process pool and return SharedResults
+
+    Games are split into fixed blocks and block i always draws from child i of
+    the seed's SeedSequence, so results do not depend on the worker count.
+    The caller must close() the returned results.
+    """
+    results = SharedResults(games)
+    blocks = range(0, games, block_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_simulate_block, results.names, games, start,
+                                       min(block_size, games - start), block_seed)
+                       for start, block_seed in zip(blocks, seeds)]
+            for future in futures:
+                future.result()
+    except BaseException:
+        results.close()
+        raise
+    return results
+
+def benchmark(games=4_000_000, seed=0):
+    """Report throughput and speedup for 1..cpu_count workers"""
+    reference = None
+    baseline = None
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        start = time.perf_counter()
+        with simulate_parallel(games, seed, workers) as results:
+            elapsed = time.perf_counter() - start
+            checksum = int(results.totals.sum(dtype=np.int64))
+        reference = reference if reference is not None else checksum
+        baseline = baseline or elapsed
+        print(f"{workers:>2} workers: {games / elapsed:,.0f} games/s, "
+              f"speedup {baseline / elapsed:.2f}x, reproducible: {checksum == reference}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 4_000_000)
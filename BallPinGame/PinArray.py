@@ -0,0 +1,230 @@
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from PinPhysics import GRAVITY, LANE_HEIGHT, Ball, Pin, LaneSimulation
+
+class PinArray:
+    """Pins stored as contiguous NumPy arrays instead of one object per pin
+
+    Knocked pins that fall off-screen are flagged in on_screen rather than
+    removed, so pin indexes stay stable.
+    """
+
+    def __init__(self, x, y, radius=15):
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), self.x.shape).copy()
+        self.velocity_x = np.zeros_like(self.x)
+        self.velocity_y = np.zeros_like(self.x)
+        self.is_hit = np.zeros(self.x.shape, dtype=bool)
+        self.on_screen = np.ones(self.x.shape, dtype=bool)
+
+    @classmethod
+    def from_pins(cls, pins):
+        return cls([pin.x for pin in pins], [pin.y for pin in pins], [pin.radius for pin in pins])
+
+    def __len__(self):
+        return len(self.x)
+
+    def check_collisions(self, ball):
+        """Return the indexes of standing pins touching the ball"""
+        dx = self.x - ball.x
+        dy = self.y - ball.y
+        reach = self.radius + ball.radius
+        return np.flatnonzero(~self.is_hit & (dx * dx + dy * dy < reach * reach))
+
+    def check_swept_collisions(self, ball):
+        """Return the indexes of standing pins touching the ball's last path segment"""
+        path_x = ball.x - ball.prev_x
+        path_y = ball.y - ball.prev_y
+        offset_x = self.x - ball.prev_x
+        offset_y = self.y - ball.prev_y
+        length_squared = path_x * path_x + path_y * path_y
+        along = 0
+        if length_squared > 0:
+            along = np.clip((offset_x * path_x + offset_y * path_y) / length_squared, 0, 1)
+        dx = offset_x - along * path_x
+        dy = offset_y - along * path_y
+        reach = self.radius + ball.radius
+        return np.flatnonzero(~self.is_hit & (dx * dx + dy * dy < reach * reach))
+
+    def knock(self, indexes, ball, force):
+        """Send pins flying directly away from the ball"""
+        angle = np.arctan2(self.y[indexes] - ball.y, self.x[indexes] - ball.x)
+        self.velocity_x[indexes] = np.cos(angle) * force
+        self.velocity_y[indexes] = np.sin(angle) * force
+
+    def fall(self, height=LANE_HEIGHT, dt=1):
+        """Move every knocked pin that is still on screen by dt frames"""
+        falling = (self.is_hit & self.on_screen) * dt
+        self.x += self.velocity_x * falling
+        self.y += self.velocity_y * falling + GRAVITY * falling * (dt - 1) / 2
+        self.velocity_y += GRAVITY * falling
+        self.on_screen &= self.y <= height + self.radius
+
+    def resolve_collisions(self):
+        """Vectorized pin-pin solver; returns the indexes of toppled pins
+
+        Same rules as LaneSimulation.resolve_pin_collisions: every flying pin
+        is paired with the on-screen pins in its own and neighbouring grid
+        cells, and all impulses come from the velocities at the start of the
+        pass.
+        """
+        falling = np.flatnonzero(self.is_hit & self.on_screen)
+        if len(falling) == 0:
+            return falling
+        present = np.flatnonzero(self.on_screen)
+
+        # Broad phase: sort on-screen pins by grid cell, then look up each
+        # flying pin's 3x3 block of cells with binary searches
+        cell_size = 2 * self.radius.max()
+        cell_x = np.floor(self.x / cell_size).astype(np.int64)
+        cell_y = np.floor(self.y / cell_size).astype(np.int64)
+        low_x, low_y = cell_x[present].min() - 1, cell_y[present].min() - 1
+        rows = cell_y[present].max() - low_y + 2
+        keys = (cell_x - low_x) * rows + (cell_y - low_y)
+        order = present[np.argsort(keys[present], kind="stable")]
+        sorted_keys = keys[order]
+        falling = falling[np.argsort(keys[falling], kind="stable")]  # Sorted needles search faster
+
+        firsts = []
+        seconds = []
+        for offset_x in (-1, 0, 1):
+            for offset_y in (-1, 0, 1):
+                targets = keys[falling] + offset_x * rows + offset_y
+                starts = np.searchsorted(sorted_keys, targets, "left")
+                counts = np.searchsorted(sorted_keys, targets, "right") - starts
+                total = counts.sum()
+                if total == 0:
+                    continue
+                ends = np.cumsum(counts)
+                positions = np.arange(total) - np.repeat(ends - counts, counts) + np.repeat(starts, counts)
+                firsts.append(np.repeat(falling, counts))
+                seconds.append(order[positions])
+        if not firsts:
+            return falling[:0]
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+
+        # Each flying pair once, flying-standing pairs always
+        keep = (first != second) & (~self.is_hit[second] | (first < second))
+        first = first[keep]
+        second = second[keep]
+
+        # Narrow phase and impulses along the contact normal
+        dx = self.x[second] - self.x[first]
+        dy = self.y[second] - self.y[first]
+        distance_squared = dx * dx + dy * dy
+        reach = self.radius[first] + self.radius[second]
+        touching = (distance_squared < reach * reach) & (distance_squared > 0)
+        first, second, dx, dy = first[touching], second[touching], dx[touching], dy[touching]
+        distance = np.sqrt(dx * dx + dy * dy)
+        normal_x = dx / distance
+        normal_y = dy / distance
+        closing = ((self.velocity_x[first] - self.velocity_x[second]) * normal_x +
+                   (self.velocity_y[first] - self.velocity_y[second]) * normal_y)
+        closing_pairs = closing > 0
+        first, second = first[closing_pairs], second[closing_pairs]
+        impulse_x = closing[closing_pairs] * normal_x[closing_pairs]
+        impulse_y = closing[closing_pairs] * normal_y[closing_pairs]
+
+        np.subtract.at(self.velocity_x, first, impulse_x)
+        np.subtract.at(self.velocity_y, first, impulse_y)
+        np.add.at(self.velocity_x, second, impulse_x)
+        np.add.at(self.velocity_y, second, impulse_y)
+
+        toppled = np.unique(second[~self.is_hit[second]])
+        self.is_hit[toppled] = True
+        return toppled
+
+class ArrayLaneSimulation(LaneSimulation):
+    """LaneSimulation over a PinArray; step() returns the indexes of pins hit"""
+
+    @property
+    def pins(self):
+        return self._pins
+
+    @pins.setter
+    def pins(self, pins):
+        self._pins = pins
+        self.knocked_down = int(pins.is_hit.sum())
+
+    def busy(self):
+        return self.ball.moving or (self.pin_collisions and bool((self.pins.is_hit & self.pins.on_screen).any()))
+
+    def step(self, dt=1):
+        ball = self.ball
+        was_moving = ball.moving
+        was_busy = self.busy()
+        ball.update(dt)
+
+        if not was_moving:
+            hits = np.empty(0, dtype=np.intp)
+        elif self.swept:
+            hits = self.pins.check_swept_collisions(ball)
+        else:
+            hits = self.pins.check_collisions(ball)
+        if len(hits):
+            self.pins.is_hit[hits] = True
+            if self.pin_force is not None:
+                self.pins.knock(hits, ball, self.pin_force)
+            if self.deflect:
+                for _ in hits:
+                    # Add some randomness to ball direction after hitting a pin
+                    angle = self.rng.uniform(0, 2 * math.pi)
+                    speed = self.rng.uniform(0.5, 2)
+                    ball.velocity_x += math.cos(angle) * speed
+                    ball.velocity_y += math.sin(angle) * speed
+
+        if self.pin_force is not None:
+            self.pins.fall(ball.height, dt)
+
+        if self.pin_collisions:
+            hits = np.concatenate((hits, self.pins.resolve_collisions()))
+
+        self.knocked_down += len(hits)
+        self.throw_finished = was_busy and not self.busy()
+        return hits
+
+def benchmark(counts=(100, 1000, 5000, 20000), steps=60, seed=0):
+    """Compare per-frame cost of object pins and array pins as racks grow"""
+    rng = random.Random(seed)
+    print(f"{'pins':>6} {'objects':>9} {'arrays':>9} {'objects+pp':>11} {'arrays+pp':>10}"
+          "  (ms per frame, half the pins flying, pp = pin-pin collisions)")
+    for count in counts:
+        side = 40 * count ** 0.5
+        positions = [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(count)]
+        knocks = [(rng.uniform(-5, 5), rng.uniform(-5, 0)) for _ in range(0, count, 2)]
+
+        timings = []
+        for pin_collisions in (False, True):
+            for simulation_class in (LaneSimulation, ArrayLaneSimulation):
+                # Knock half of the pins up front so both paths integrate flying pins
+                if simulation_class is LaneSimulation:
+                    pins = [Pin(x, y) for x, y in positions]
+                    for pin, (velocity_x, velocity_y) in zip(pins[::2], knocks):
+                        pin.is_hit = True
+                        pin.velocity_x = velocity_x
+                        pin.velocity_y = velocity_y
+                else:
+                    pins = PinArray([x for x, _ in positions], [y for _, y in positions])
+                    pins.is_hit[::2] = True
+                    pins.velocity_x[::2] = [velocity_x for velocity_x, _ in knocks]
+                    pins.velocity_y[::2] = [velocity_y for _, velocity_y in knocks]
+
+                ball = Ball(side / 2, side, width=side, height=side + 100)
+                ball.power = 50
+                ball.throw()
+                sim = simulation_class(ball, pins, deflect=False, pin_force=5, pin_collisions=pin_collisions)
+                start = time.perf_counter()
+                for _ in range(steps):
+                    sim.step()
+                timings.append((time.perf_counter() - start) / steps * 1000)
+        print(f"{count:>6} {timings[0]:>9.3f} {timings[1]:>9.3f} {timings[2]:>11.3f} {timings[3]:>10.3f}")
+
+if __name__ == "__main__":
+    benchmark(tuple(int(count) for count in sys.argv[1:]) or (100, 1000, 5000, 20000))
@@ -0,0 +1,369 @@
+import math
+import random
+import sys
+import time
+
+from SpatialHash import SpatialHash
+
+# Constants
+LANE_WIDTH = 800
+LANE_HEIGHT = 600
+FRICTION = 0.98
+STOP_SPEED = 0.1
+BOUNCE = 0.8
+GRAVITY = 0.2
+PHYSICS_VERSION = 1  # Bump whenever a change can alter the outcome of a throw; stored tables check it
+
+class Pin:
+    def __init__(self, x, y, radius=15):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.is_hit = False
+        self.velocity_x = 0
+        self.velocity_y = 0
+
+    def check_collision(self, ball):
+        if self.is_hit:
+            return False
+
+        dx = self.x - ball.x
+        dy = self.y - ball.y
+        reach = self.radius + ball.radius
+        return dx * dx + dy * dy < reach * reach
+
+    def check_swept_collision(self, ball):
+        """Like check_collision, but against the whole path of the ball's last update"""
+        if self.is_hit:
+            return False
+
+        path_x = ball.x - ball.prev_x
+        path_y = ball.y - ball.prev_y
+        offset_x = self.x - ball.prev_x
+        offset_y = self.y - ball.prev_y
+        length_squared = path_x * path_x + path_y * path_y
+        along = 0
+        if length_squared > 0:
+            along = min(max((offset_x * path_x + offset_y * path_y) / length_squared, 0), 1)
+        dx = offset_x - along * path_x
+        dy = offset_y - along * path_y
+        reach = self.radius + ball.radius
+        return dx * dx + dy * dy < reach * reach
+
+    def touches(self, other):
+        dx = self.x - other.x
+        dy = self.y - other.y
+        reach = self.radius + other.radius
+        return dx * dx + dy * dy < reach * reach
+
+    def knock(self, ball, force):
+        """Send the pin flying away from the ball"""
+        angle = math.atan2(self.y - ball.y, self.x - ball.x)
+        self.velocity_x = math.cos(angle) * force
+        self.velocity_y = math.sin(angle) * force
+
+    def fall(self, height=LANE_HEIGHT, dt=1):
+        """Move a knocked pin dt frames; returns False once it is off-screen"""
+        self.x += self.velocity_x * dt
+        self.y += self.velocity_y * dt + GRAVITY * dt * (dt - 1) / 2
+        self.velocity_y += GRAVITY * dt
+        return self.y <= height + self.radius
+
+class Ball:
+    def __init__(self, x, y, radius=20, width=LANE_WIDTH, height=LANE_HEIGHT):
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.radius = radius
+        self.width = width
+        self.height = height
+        self.velocity_x = 0
+        self.velocity_y = 0
+        self.moving = False
+        self.power = 0
+        self.angle = -math.pi/2  # Pointing upward
+
+    def update(self, dt=1):
+        """Move the ball dt frames (1 = one 60 FPS frame)"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+        if self.moving:
+            # Friction is applied per frame, so over part of a frame the ball
+            # covers the matching part of that frame's distance
+            decay = FRICTION ** dt
+            travelled = (1 - decay) / (1 - FRICTION)
+            self.x += self.velocity_x * travelled
+            self.y += self.velocity_y * travelled
+
+            # Apply friction
+            self.velocity_x *= decay
+            self.velocity_y *= decay
+
+            # Check if ball has stopped
+            if abs(self.velocity_x) < STOP_SPEED and abs(self.velocity_y) < STOP_SPEED:
+                self.velocity_x = 0
+                self.velocity_y = 0
+                self.moving = False
+
+            # Check boundaries
+            if self.x < self.radius:
+                self.x = self.radius
+                self.velocity_x = -self.velocity_x * BOUNCE
+            elif self.x > self.width - self.radius:
+                self.x = self.width - self.radius
+                self.velocity_x = -self.velocity_x * BOUNCE
+
+            if self.y < self.radius:
+                self.y = self.radius
+                self.velocity_y = -self.velocity_y * BOUNCE
+            elif self.y > self.height - self.radius:
+                self.y = self.height - self.radius
+                self.velocity_y = -self.velocity_y * BOUNCE
+
+    def throw(self):
+        if not self.moving:
+            self.velocity_x = math.cos(self.angle) * (self.power / 5)
+            self.velocity_y = math.sin(self.angle) * (self.power / 5)
+            self.moving = True
+
+    def reset(self, x, y, power=0):
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.velocity_x = 0
+        self.velocity_y = 0
+        self.moving = False
+        self.power = power
+        self.angle = -math.pi/2  # Pointing upward
+
+def setup_pins(pin_class=Pin, width=LANE_WIDTH, rows=4, spacing=40, start_y=100):
+    """Create a triangular formation of pins"""
+    pins = []
+    start_x = width // 2
+
+    for row in range(rows):
+        for col in range(row + 1):
+            x = start_x + (col - row/2) * spacing
+            y = start_y + row * spacing
+            pins.append(pin_class(x, y))
+
+    return pins
+
+class LaneSimulation:
+    """Steps a ball and a rack of pins with no display attached
+
+    deflect: knock the ball in a random direction each time it hits a pin
+    pin_force: if set, knocked pins fly off at this speed and fall away
+    pin_collisions: let flying pins topple and bounce off other pins
+    swept: test pins against the ball's whole path each step, so a fast
+        ball or a long step cannot pass through a pin
+    """
+
+    def __init__(self, ball, pins, deflect=True, pin_force=None, rng=random, pin_collisions=False, swept=False):
+        self.ball = ball
+        self.pins = pins
+        self.deflect = deflect
+        self.pin_force = pin_force
+        self.pin_collisions = pin_collisions
+        self.swept = swept
+        self.rng = rng
+        self.throw_finished = False
+
+    @property
+    def pins(self):
+        return self._pins
+
+    @pins.setter
+    def pins(self, pins):
+        self._pins = pins
+        self.knocked_down = sum(1 for pin in pins if pin.is_hit)
+        self.rebuild_grid()
+
+    def rebuild_grid(self):
+        """Bucket the pins into a grid sized to the largest collision reach"""
+        pin_radius = max((pin.radius for pin in self._pins), default=0)
+        self.grid = SpatialHash(max(self.ball.radius, pin_radius) + pin_radius)
+        for pin in self._pins:
+            self.grid.insert(pin, pin.x, pin.y)
+
+    def busy(self):
+        """True while the ball rolls or, with pin collisions, pins are still flying"""
+        return self.ball.moving or (self.pin_collisions and any(pin.is_hit for pin in self._pins))
+
+    def step(self, dt=1):
+        """Advance dt frames and return the pins knocked down during them"""
+        ball = self.ball
+        was_moving = ball.moving
+        was_busy = self.busy()
+        ball.update(dt)
+        hits = self.ball_hits() if was_moving else []
+
+        # Move knocked pins and drop the ones that left the screen
+        if self.pin_force is not None:
+            self.pins[:] = [pin for pin in self.pins
+                            if not pin.is_hit or pin.fall(ball.height, dt)]
+
+        if self.pin_collisions:
+            hits.extend(self.resolve_pin_collisions())
+
+        self.knocked_down += len(hits)
+        self.throw_finished = was_busy and not self.busy()
+        return hits
+
+    def ball_hits(self):
+        """Knock down the standing pins the ball touches, in rack order, and return them"""
+        ball = self.ball
+        if self.swept:
+            reach = self.grid.cell_size
+            nearby = self.grid.query_rect(min(ball.prev_x, ball.x) - reach, min(ball.prev_y, ball.y) - reach,
+                                          max(ball.prev_x, ball.x) + reach, max(ball.prev_y, ball.y) + reach)
+            check = Pin.check_swept_collision
+        else:
+            nearby = self.grid.query(ball.x, ball.y)
+            check = Pin.check_collision
+
+        hits = []
+        for pin in nearby:
+            if check(pin, ball):
+                pin.is_hit = True
+                hits.append(pin)
+
+                if self.pin_force is not None:
+                    pin.knock(ball, self.pin_force)
+
+                if self.deflect:
+                    # Add some randomness to ball direction after hitting a pin
+                    angle = self.rng.uniform(0, 2 * math.pi)
+                    speed = self.rng.uniform(0.5, 2)
+                    ball.velocity_x += math.cos(angle) * speed
+                    ball.velocity_y += math.sin(angle) * speed
+        return hits
+
+    def resolve_pin_collisions(self):
+        """Let knocked pins topple and bounce off the pins they touch
+
+        Every touching pair is found first and all impulses are computed from
+        the velocities at the start of the pass (equal masses, elastic along
+        the contact normal), so the result does not depend on pin order.
+        Returns the standing pins that were toppled.
+
+        This stays a plain loop on purpose: for the games' ten-pin rack it takes
+        about 20 us, where PinArray.resolve_collisions() takes about 280 us.
+        The loop is slower past a hundred pins or so, and racks that large
+        belong in an ArrayLaneSimulation.
+        """
+        falling = [pin for pin in self._pins if pin.is_hit]
+        if not falling:
+            return []
+        falling_grid = SpatialHash(self.grid.cell_size)
+        for index, pin in enumerate(falling):
+            falling_grid.insert((index, pin), pin.x, pin.y)
+
+        contacts = []
+        for index, pin in enumerate(falling):
+            for other in self.grid.query(pin.x, pin.y):
+                if not other.is_hit and pin.touches(other):
+                    contacts.append((pin, other))
+            for other_index, other in falling_grid.query(pin.x, pin.y):
+                if other_index > index and pin.touches(other):
+                    contacts.append((pin, other))
+
+        impulses = []
+        for pin, other in contacts:
+            dx = other.x - pin.x
+            dy = other.y - pin.y
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance == 0:
+                continue
+            normal_x = dx / distance
+            normal_y = dy / distance
+            closing = ((pin.velocity_x - other.velocity_x) * normal_x +
+                       (pin.velocity_y - other.velocity_y) * normal_y)
+            if closing > 0:
+                impulses.append((pin, other, closing * normal_x, closing * normal_y))
+
+        toppled = []
+        for pin, other, impulse_x, impulse_y in impulses:
+            pin.velocity_x -= impulse_x
+            pin.velocity_y -= impulse_y
+            other.velocity_x += impulse_x
+            other.velocity_y += impulse_y
+            if not other.is_hit:
+                other.is_hit = True
+                toppled.append(other)
+        return toppled
+
+    def run_throw(self, power, angle, max_steps=100000, dt=1):
+        """Throw the ball and step until it stops; returns the number of pins hit"""
+        self.ball.power = power
+        self.ball.angle = angle
+        self.ball.throw()
+
+        hit = 0
+        for _ in range(max_steps):
+            hit += len(self.step(dt))
+            if not self.busy():
+                break
+        return hit
+
+class FixedTimestep:
+    """Runs a simulation at a fixed rate, however fast frames are drawn
+
+    Elapsed wall-clock time is collected in an accumulator and spent in whole
+    steps of 1 / rate seconds, each split into substeps simulation steps.
+    Long pauses are clamped to max_elapsed so a stall cannot trigger a burst
+    of catch-up steps. alpha is how far the accumulator is into the next
+    step, for drawing the ball between its last two positions.
+    """
+
+    def __init__(self, rate=240, substeps=1, max_elapsed=0.25):
+        self.rate = rate
+        self.substeps = substeps
+        self.max_elapsed = max_elapsed
+        self.step_time = 1 / rate
+        self.dt = 60 / (rate * substeps)  # Simulation step in 60 FPS frames
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self._previous = None
+
+    def advance(self, simulation, elapsed):
+        """Run the steps covered by elapsed seconds; returns the pins hit
+
+        simulation.throw_finished is set if a throw finished in any of them.
+        """
+        self.accumulator += min(elapsed, self.max_elapsed)
+        hits = []
+        finished = False
+        while self.accumulator >= self.step_time:
+            self.accumulator -= self.step_time
+            self._previous = (simulation.ball.x, simulation.ball.y)
+            for _ in range(self.substeps):
+                hits.extend(simulation.step(self.dt))
+                finished = finished or simulation.throw_finished
+        simulation.throw_finished = finished
+        self.alpha = self.accumulator / self.step_time
+        return hits
+
+    def interpolate(self, ball):
+        """Position to draw a rolling ball at, between its last two steps"""
+        if not ball.moving or self._previous is None:
+            return ball.x, ball.y
+        x, y = self._previous
+        return x + (ball.x - x) * self.alpha, y + (ball.y - y) * self.alpha
+
+def benchmark(throws=2000, seed=0):
+    """Simulate full throws headlessly and report throws/second"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    knocked = 0
+    for _ in range(throws):
+        ball = Ball(LANE_WIDTH // 2, LANE_HEIGHT - 50)
+        sim = LaneSimulation(ball, setup_pins(), rng=rng)
+        knocked += sim.run_throw(rng.randint(20, 50), rng.uniform(-1.8, -1.35))
+    elapsed = time.perf_counter() - start
+    print(f"{throws / elapsed:,.0f} throws/s, {knocked / throws:.2f} pins per throw")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,127 @@
+import sys
+import time
+from fractions import Fraction
+from functools import lru_cache
+
+MAX_SCORE = 300
+
+@lru_cache(maxsize=None)
+def _transitions(state, total_frames):
+    """List the outcomes of the next throw from a game state
+
+    A state is (frame, ball, pins, bonus, pending) where pending holds
+    (frame index, bonus throws owed) for unpaid strikes and spares, and bonus
+    marks a strike or spare in the final frame. Each outcome is
+    (knocked_down, next_state, points, mark) where points lists
+    (frame index, points) and mark is "strike", "spare" or None.
+    """
+    frame, ball, pins, bonus, pending = state
+    last = total_frames - 1
+    outcomes = []
+
+    for knocked_down in range(pins + 1):
+        # Pay out bonuses owed by earlier strikes and spares
+        points = [(owed_frame, knocked_down) for owed_frame, _ in pending]
+        still_pending = tuple((owed_frame, owed - 1) for owed_frame, owed in pending if owed > 1)
+        points.append((frame, knocked_down))
+        left = pins - knocked_down
+        mark = None
+
+        if frame == last:
+            if ball == 0 and left == 0:
+                mark = "strike"
+            elif ball == 1 and left == 0 and not bonus:
+                mark = "spare"
+            if left == 0:
+                left = 10  # Reset pins for bonus throw
+            final_bonus = bonus or mark is not None
+            if ball == 2 or (ball == 1 and not final_bonus):
+                next_state = None
+            else:
+                next_state = (frame, ball + 1, left, final_bonus, still_pending)
+        elif ball == 0 and knocked_down == 10:
+            mark = "strike"
+            next_state = (frame + 1, 0, 10, False, still_pending + ((frame, 2),))
+        elif ball == 0:
+            next_state = (frame, 1, left, False, still_pending)
+        else:
+            if left == 0:
+                mark = "spare"
+                still_pending += ((frame, 1),)
+            next_state = (frame + 1, 0, 10, False, still_pending)
+
+        outcomes.append((knocked_down, next_state, tuple(points), mark))
+
+    return tuple(outcomes)
+
+class ScoreDistribution:
+    """Exact final-score distribution of games with uniformly random pinfall
+
+    Every throw knocks down 0..pins standing with equal probability, the same
+    model as BowlingGame.throw_ball. Set exact=True for Fraction probabilities.
+    """
+
+    def __init__(self, total_frames=10, exact=False):
+        self.total_frames = total_frames
+        zero = Fraction(0) if exact else 0.0
+        one = Fraction(1) if exact else 1.0
+
+        self.pmf = [zero] * (MAX_SCORE + 1)
+        self.expected_frame_scores = [zero] * total_frames
+        self.strike_probability = [zero] * total_frames
+        self.spare_probability = [zero] * total_frames
+
+        # Forward pass over states; (frame, ball) always increases with each throw
+        start = (0, 0, 10, False, ())
+        layers = {(0, 0): {start: {0: one}}}
+        while layers:
+            key = min(layers)
+            for state, scores in layers.pop(key).items():
+                mass = sum(scores.values())
+                chance = one / (state[2] + 1)
+
+                for _, next_state, points, mark in _transitions(state, total_frames):
+                    gained = 0
+                    for frame, value in points:
+                        self.expected_frame_scores[frame] += mass * chance * value
+                        gained += value
+                    if mark == "strike":
+                        self.strike_probability[state[0]] += mass * chance
+                    elif mark == "spare":
+                        self.spare_probability[state[0]] += mass * chance
+
+                    if next_state is None:
+                        for score, probability in scores.items():
+                            self.pmf[score + gained] += probability * chance
+                        continue
+
+                    target = layers.setdefault(next_state[:2], {}).setdefault(next_state, {})
+                    for score, probability in scores.items():
+                        target[score + gained] = target.get(score + gained, zero) + probability * chance
+
+    def mean(self):
+        """Expected final score"""
+        return sum(score * probability for score, probability in enumerate(self.pmf))
+
+def benchmark(games=1_000_000, seed=0):
+    """Time the exact calculation and compare it with Monte Carlo"""
+    start = time.perf_counter()
+    distribution = ScoreDistribution()
+    elapsed = time.perf_counter() - start
+    print(f"Exact distribution in {elapsed * 1000:.1f} ms, mean score {distribution.mean():.4f}")
+    print("Strike probability by frame:", " ".join(f"{p:.3f}" for p in distribution.strike_probability))
+    print("Spare probability by frame: ", " ".join(f"{p:.3f}" for p in distribution.spare_probability))
+
+    import numpy as np
+    from Simulation import simulate_games
+    start = time.perf_counter()
+    histogram = np.zeros(MAX_SCORE + 1)
+    for _, _, totals in simulate_games(games, seed):
+        histogram += np.bincount(totals, minlength=MAX_SCORE + 1)
+    elapsed = time.perf_counter() - start
+    gap = np.abs(histogram / games - np.array(distribution.pmf)).max()
+    print(f"Monte Carlo ({games:,} games) in {elapsed * 1000:.1f} ms, "
+          f"mean {histogram @ np.arange(MAX_SCORE + 1) / games:.4f}, largest PMF gap {gap:.5f}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,10 +1,15 @@
 import pygame
 import sys
-import random
 import math
+from functools import partial
 
-# Initialize pygame
-pygame.init()
+from AimPreview import AimPreview
+from DirtyRenderer import DirtyRenderer
+from FrameScheduler import FrameScheduler
+from FrameProfiler import FrameProfiler
+from Startup import font, init_display
+from SurfaceCache import SurfaceCache
+from PinPhysics import Ball as BallBody, Pin as PinBody, LaneSimulation, FixedTimestep, setup_pins
 
 # Constants
 SCREEN_WIDTH = 800
@@ -17,179 +22,176 @@ BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
 GRAY = (200, 200, 200)
 
-class Pin:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 15
-        self.is_hit = False
-        self.velocity_x = 0
-        self.velocity_y = 0
-        
+# Pre-rendered text and sprites shared by everything drawn
+surfaces = SurfaceCache()
+
+class Pin(PinBody):
     def draw(self, screen):
+        corner = (int(self.x) - self.radius, int(self.y) - self.radius)
         if not self.is_hit:
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius)
-            pygame.draw.circle(screen, BLACK, (int(self.x), int(self.y)), self.radius, 2)
+            screen.blit(surfaces.circle(self.radius, WHITE), corner)
+            screen.blit(surfaces.circle(self.radius, BLACK, 2), corner)
         else:
             # Draw falling pin
-            self.x += self.velocity_x
-            self.y += self.velocity_y
-            self.velocity_y += 0.2  # Gravity
-            
-            if self.y > SCREEN_HEIGHT + self.radius:
-                return False  # Pin is off-screen
-                
-            pygame.draw.circle(screen, GRAY, (int(self.x), int(self.y)), self.radius)
-            
-        return True
-            
-    def check_collision(self, ball):
-        if self.is_hit:
-            return False
-            
-        distance = math.sqrt((self.x - ball.x)**2 + (self.y - ball.y)**2)
-        if distance < (self.radius + ball.radius):
-            self.is_hit = True
-            
-            # Calculate angle of impact
-            angle = math.atan2(self.y - ball.y, self.x - ball.x)
-            force = 5
-            
-            # Set velocity based on impact
-            self.velocity_x = math.cos(angle) * force
-            self.velocity_y = math.sin(angle) * force
-            
-            return True
-        return False
+            screen.blit(surfaces.circle(self.radius, GRAY), corner)
+
+    def bounds(self):
+        return pygame.Rect(int(self.x) - self.radius - 1, int(self.y) - self.radius - 1,
+                           2 * self.radius + 3, 2 * self.radius + 3)
 
-class Ball:
+class Ball(BallBody):
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 20
+        super().__init__(x, y, width=SCREEN_WIDTH, height=SCREEN_HEIGHT)
         self.color = BLUE
-        self.velocity_x = 0
-        self.velocity_y = 0
-        self.moving = False
-        self.power = 0
-        self.angle = -math.pi/2  # Pointing upward
         
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+    def draw(self, screen, position=None):
+        x, y = position or (self.x, self.y)
+        screen.blit(surfaces.circle(self.radius, self.color), (int(x) - self.radius, int(y) - self.radius))
         
         # Draw aiming line when not moving
         if not self.moving:
             end_x = self.x + math.cos(self.angle) * self.power * 3
             end_y = self.y + math.sin(self.angle) * self.power * 3
             pygame.draw.line(screen, RED, (self.x, self.y), (end_x, end_y), 3)
-        
-    def update(self):
-        if self.moving:
-            # Update position
-            self.x += self.velocity_x
-            self.y += self.velocity_y
-            
-            # Apply friction
-            self.velocity_x *= 0.98
-            self.velocity_y *= 0.98
-            
-            # Check if ball has stopped
-            if abs(self.velocity_x) < 0.1 and abs(self.velocity_y) < 0.1:
-                self.velocity_x = 0
-                self.velocity_y = 0
-                self.moving = False
-                
-            # Check boundaries
-            if self.x < self.radius:
-                self.x = self.radius
-                self.velocity_x = -self.velocity_x * 0.8
-            elif self.x > SCREEN_WIDTH - self.radius:
-                self.x = SCREEN_WIDTH - self.radius
-                self.velocity_x = -self.velocity_x * 0.8
-                
-            if self.y < self.radius:
-                self.y = self.radius
-                self.velocity_y = -self.velocity_y * 0.8
-            elif self.y > SCREEN_HEIGHT - self.radius:
-                self.y = SCREEN_HEIGHT - self.radius
-                self.velocity_y = -self.velocity_y * 0.8
-                
-    def throw(self):
+
+    def bounds(self, position=None):
+        x, y = position or (self.x, self.y)
+        rect = pygame.Rect(int(x) - self.radius - 1, int(y) - self.radius - 1,
+                           2 * self.radius + 3, 2 * self.radius + 3)
         if not self.moving:
-            self.velocity_x = math.cos(self.angle) * (self.power / 5)
-            self.velocity_y = math.sin(self.angle) * (self.power / 5)
-            self.moving = True
+            # Include the aiming line
+            end_x = x + math.cos(self.angle) * self.power * 3
+            end_y = y + math.sin(self.angle) * self.power * 3
+            rect.union_ip(pygame.Rect(int(min(x, end_x)) - 3, int(min(y, end_y)) - 3,
+                                      int(abs(end_x - x)) + 7, int(abs(end_y - y)) + 7))
+        return rect
             
     def reset(self, x, y):
-        self.x = x
-        self.y = y
-        self.velocity_x = 0
-        self.velocity_y = 0
-        self.moving = False
-        self.power = 20  # Default power
-        self.angle = -math.pi/2  # Pointing upward
+        super().reset(x, y, power=20)  # Default power
 
 class PinGame:
     def __init__(self):
+        init_display()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Ball Pin Game")
         self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler(self.clock, FPS)
         
         self.ball = Ball(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
-        self.pins = []
+        self.sim = LaneSimulation(self.ball, [], deflect=False, pin_force=5, pin_collisions=True, swept=True)
+        self.timestep = FixedTimestep(rate=240)
         self.setup_pins()
         
         self.score = 0
         self.throws = 0
-        self.font = pygame.font.SysFont(None, 36)
-        self.small_font = pygame.font.SysFont(None, 24)
+        self.font = font(36)
+        self.small_font = font(24)
         
-    def setup_pins(self):
-        self.pins = []
+        self.preview = AimPreview(dt=self.timestep.dt)
+        self.aiming = False
+        
+        self.renderer = DirtyRenderer(self.screen, self.draw_background)
+        self.profiler = FrameProfiler()
         
+    def setup_pins(self):
         # Create a triangular formation of pins
-        rows = 4
-        spacing = 40
-        start_x = SCREEN_WIDTH // 2
-        start_y = 100
-        
-        for row in range(rows):
-            for col in range(row + 1):
-                x = start_x + (col - row/2) * spacing
-                y = start_y + row * spacing
-                self.pins.append(Pin(x, y))
+        self.pins = setup_pins(Pin, SCREEN_WIDTH)
+        self.sim.pins = self.pins
                 
     def reset_game(self):
+        self.scheduler.cancel(self.reset_game)
         self.setup_pins()
         self.ball.reset(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
         self.throws += 1
         
-    def draw_background(self):
+    def draw_background(self, surface):
         # Draw a simple background
-        self.screen.fill(GREEN)
+        surface.fill(GREEN)
         
         # Draw the playing area
-        pygame.draw.rect(self.screen, GRAY, (50, 50, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100))
-        
-    def draw_ui(self):
+        pygame.draw.rect(surface, GRAY, (50, 50, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100))
+        
+    def preview_bounds(self, prediction):
+        path, falling = prediction
+        xs = [int(x) for x, _ in path]
+        ys = [int(y) for _, y in path]
+        rect = pygame.Rect(min(xs) - 1, min(ys) - 1, max(xs) - min(xs) + 3, max(ys) - min(ys) + 3)
+        for index in falling:
+            rect.union_ip(self.pins[index].bounds())
+        return rect
+        
+    def draw_preview(self, prediction):
+        # Draw the predicted path and outline the pins it will knock down
+        path, falling = prediction
+        if len(path) > 1:
+            pygame.draw.lines(self.screen, RED, False, path, 1)
+        for index in falling:
+            pin = self.pins[index]
+            self.screen.blit(surfaces.circle(pin.radius, RED, 3), (int(pin.x) - pin.radius, int(pin.y) - pin.radius))
+            
+    def draw_score(self):
         # Draw score
-        score_text = self.font.render(f"Score: {self.score}", True, BLACK)
-        throws_text = self.font.render(f"Throws: {self.throws}", True, BLACK)
+        score_text = surfaces.text(self.font, f"Score: {self.score}", BLACK)
+        throws_text = surfaces.text(self.font, f"Throws: {self.throws}", BLACK)
         
         self.screen.blit(score_text, (20, 20))
         self.screen.blit(throws_text, (20, 60))
         
+    def draw_instructions(self):
         # Draw instructions
         if not self.ball.moving:
-            instructions = self.small_font.render("UP/DOWN: Adjust power, LEFT/RIGHT: Aim, SPACE: Throw, R: Reset", True, BLACK)
+            instructions = surfaces.text(self.small_font, "UP/DOWN: Adjust power, LEFT/RIGHT: Aim, SPACE: Throw, R: Reset", BLACK)
             self.screen.blit(instructions, (SCREEN_WIDTH // 2 - 250, SCREEN_HEIGHT - 30))
         
+    def toggle_profiler(self):
+        # Time each phase of the frame and show the overlay, or stop
+        if self.profiler.enabled:
+            self.profiler.disable()
+            return
+        self.profiler.enable([
+            (self.ball, "update", "ball.update"),
+            (self.sim, "ball_hits", "collisions"),
+            (self.sim, "resolve_pin_collisions", "pin collisions"),
+            (self.preview, "predict", "aim preview"),
+            (Pin, "draw", "draw pins"),
+            (self.ball, "draw", "draw ball"),
+            (self, "draw_preview", "draw_preview"),
+            (self, "draw_score", "draw_score"),
+            (self, "draw_instructions", "draw_instructions"),
+            (self.renderer, "present", "display.update"),
+        ])
+        
+    def scene_items(self):
+        # Everything drawn over the background, in drawing order, as
+        # (id, key, bounds, draw) for the dirty-rect renderer
+        items = [(id(pin), (int(pin.x), int(pin.y), pin.is_hit), pin.bounds(), partial(pin.draw, self.screen))
+                 for pin in self.pins]
+        
+        # Predicted throw while aiming
+        if self.aiming:
+            prediction = self.preview.predict(self.ball, self.pins)
+            items.append(("preview", prediction, self.preview_bounds(prediction), partial(self.draw_preview, prediction)))
+            
+        # Ball between its last two physics steps
+        position = self.timestep.interpolate(self.ball)
+        ball_key = (int(position[0]), int(position[1]), self.ball.moving, self.ball.power, self.ball.angle)
+        items.append(("ball", ball_key, self.ball.bounds(position), partial(self.ball.draw, self.screen, position)))
+        
+        # UI: score in the corner, instructions along the bottom
+        items.append(("score", (self.score, self.throws), pygame.Rect(20, 20, 260, 70), self.draw_score))
+        items.append(("instructions", self.ball.moving, pygame.Rect(0, SCREEN_HEIGHT - 35, SCREEN_WIDTH, 35), self.draw_instructions))
+        if self.profiler.enabled:
+            items.append(self.profiler.overlay_item(self.screen, self.small_font))
+        return items
+        
     def run(self):
         running = True
         
         while running:
-            # Handle events
-            for event in pygame.event.get():
+            # Handle events, sleeping until input while nothing moves
+            events = self.scheduler.events(idle=not (self.sim.busy() or self.aiming))
+            self.profiler.start_frame()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     
@@ -198,10 +200,19 @@ class PinGame:
                         self.ball.throw()
                     elif event.key == pygame.K_r:
                         self.reset_game()
+                    elif event.key == pygame.K_F3:
+                        self.toggle_profiler()
+                    elif event.key == pygame.K_F4 and self.profiler.enabled:
+                        self.profiler.dump("frame_profile.csv")
+                        
+            self.profiler.mark("events")
                         
             # Handle continuous key presses
+            self.aiming = False
             if not self.ball.moving:
                 keys = pygame.key.get_pressed()
+                self.aiming = (keys[pygame.K_UP] or keys[pygame.K_DOWN] or
+                               keys[pygame.K_LEFT] or keys[pygame.K_RIGHT])
                 if keys[pygame.K_UP]:
                     self.ball.power = min(self.ball.power + 1, 50)
                 if keys[pygame.K_DOWN]:
@@ -211,40 +222,27 @@ class PinGame:
                 if keys[pygame.K_RIGHT]:
                     self.ball.angle = min(self.ball.angle + 0.05, 0)
                     
-            # Update
-            self.ball.update()
-            
-            # Check for collisions with pins
-            pins_hit_this_frame = 0
-            for pin in self.pins:
-                if pin.check_collision(self.ball):
-                    pins_hit_this_frame += 1
+            self.profiler.mark("input")
+                    
+            # Step ball, knocked pins and collisions at the fixed physics rate
+            pins_hit_this_frame = len(self.timestep.advance(self.sim, self.scheduler.elapsed))
                     
             # Update score
             self.score += pins_hit_this_frame
+            self.profiler.mark("physics")
             
-            # Draw
-            self.draw_background()
-            
-            # Draw pins (and remove any that are off-screen)
-            self.pins = [pin for pin in self.pins if pin.draw(self.screen)]
-            
-            # Draw ball
-            self.ball.draw(self.screen)
-            
-            # Draw UI
-            self.draw_ui()
+            # Draw and push only what changed since the last frame
+            self.renderer.render(self.scene_items())
+            self.profiler.mark("render")
             
             # Check if all pins are hit
-            if all(pin.is_hit for pin in self.pins) and not self.ball.moving:
+            if (all(pin.is_hit for pin in self.pins) and not self.ball.moving and
+                    not self.scheduler.scheduled(self.reset_game)):
                 # Wait a moment before resetting
-                pygame.display.flip()
-                pygame.time.wait(1000)
-                self.reset_game()
+                self.scheduler.after(1.0, self.reset_game)
+            self.profiler.end_frame()
                 
-            # Update display
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            self.scheduler.tick()
             
         pygame.quit()
         sys.exit()
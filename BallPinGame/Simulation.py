@@ -0,0 +1,91 @@
+import sys
+import time
+
+import numpy as np
+
+from BatchScoring import MAX_THROWS, score_games
+
+def simulate_throws(uniforms):
+    """Play one game per row of uniform draws and return the pins knocked down
+
+    Each game owns a row of 21 draws and uses them in order, one per throw,
+    knocking down int(u * (pins + 1)) pins just like BowlingGame.throw_ball.
+    Slots after the last throw of a game are left at 0.
+    """
+    games = uniforms.shape[0]
+    throws = np.zeros((games, MAX_THROWS), dtype=np.uint8)
+
+    frame = np.zeros(games, dtype=np.int8)
+    ball = np.zeros(games, dtype=np.int8)  # Throw number within the frame
+    pins = np.full(games, 10, dtype=np.int8)  # Held at 0 once a game is over, so it knocks nothing down
+    bonus = np.zeros(games, dtype=bool)  # Strike on the first throw of the final frame
+    live = np.ones(games, dtype=bool)
+
+    # Scratch arrays reused by every slot
+    reach = np.empty(games)
+    knocked_down = np.empty(games, dtype=np.int8)
+
+    for slot in range(MAX_THROWS):
+        np.add(pins, 1, out=reach)
+        reach *= uniforms[:, slot]
+        knocked_down[...] = reach
+        throws[:, slot] = knocked_down
+        pins -= knocked_down
+        cleared = pins == 0
+
+        # Frames 1-9 end on a strike or after the second throw. Nine strikes
+        # take nine slots, so no game reaches the final frame before slot 9
+        frame_over = cleared | (ball == 1)
+        if slot >= 9:
+            frame_over &= (frame < 9) & live
+
+            # Final frame: a strike or spare earns a third throw
+            final = (frame == 9) & live
+            bonus |= final & (ball == 0) & cleared
+            live &= ~(final & ((ball == 2) | ((ball == 1) & ~(bonus | cleared))))
+
+        pins[cleared | frame_over] = 10
+        if slot >= 9:
+            pins *= live
+        ball += 1
+        ball *= ~frame_over
+        frame += frame_over
+
+    return throws
+
+def simulate_games(games, seed=None, chunk_size=1 << 14):
+    """Simulate games in chunks, yielding (throws, frame_scores, totals) arrays
+
+    Game i of a run uses draws [21 * i, 21 * i + 21) of the seeded stream, so
+    game 0 is the game BowlingGame(rng=np.random.default_rng(seed)) plays.
+    """
+    rng = np.random.default_rng(seed)
+    remaining = games
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        throws = simulate_throws(rng.random((size, MAX_THROWS)))
+        frame_scores, totals = score_games(throws)
+        yield throws, frame_scores, totals
+        remaining -= size
+
+def interactive_rng(seed, game_index=0):
+    """Return a generator that makes BowlingGame replay a simulated game"""
+    rng = np.random.default_rng(seed)
+    rng.random(game_index * MAX_THROWS)
+    return rng
+
+def benchmark(games=10_000_000, seed=0):
+    """Simulate games and report throughput and the score distribution"""
+    histogram = np.zeros(301, dtype=np.int64)
+    start = time.perf_counter()
+    for _, _, totals in simulate_games(games, seed):
+        histogram += np.bincount(totals, minlength=301)
+    elapsed = time.perf_counter() - start
+
+    scores = np.arange(301)
+    mean = (histogram * scores).sum() / games
+    print(f"Simulated {games:,} games in {elapsed:.2f}s ({games / elapsed:,.0f} games/s)")
+    print(f"Mean score {mean:.2f}, best {scores[histogram > 0].max()}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
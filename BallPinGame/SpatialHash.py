@@ -0,0 +1,111 @@
+import random
+import sys
+import time
+
+class SpatialHash:
+    """Uniform grid that buckets bodies by the cell holding their centre
+
+    With a cell size at least as large as the biggest collision reach (the sum
+    of the two radii), anything that can touch a body has its centre in the
+    body's cell or one of the eight around it. Queries return items in
+    insertion order and are cached per cell until the grid changes.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self._blocks = {}
+        self._count = 0
+
+    def cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def clear(self):
+        self.cells.clear()
+        self._blocks.clear()
+
+    def insert(self, item, x, y):
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        self.cells.setdefault(cell, []).append((self._count, item))
+        self._count += 1
+        if self._blocks:
+            self._blocks.clear()
+
+    def query(self, x, y):
+        """Return the items in the 3x3 block of cells around a point
+
+        The returned list is shared with the cache and must not be modified.
+        """
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        block = self._blocks.get(cell)
+        if block is None:
+            cell_x, cell_y = cell
+            found = []
+            for column in (cell_x - 1, cell_x, cell_x + 1):
+                for row in (cell_y - 1, cell_y, cell_y + 1):
+                    bucket = self.cells.get((column, row))
+                    if bucket:
+                        found.extend(bucket)
+            found.sort(key=_insertion_order)
+            block = self._blocks[cell] = [item for _, item in found]
+        return block
+
+    def query_rect(self, left, top, right, bottom):
+        """Return the items in every cell overlapping a rectangle, in insertion order"""
+        found = []
+        for column in range(int(left // self.cell_size), int(right // self.cell_size) + 1):
+            for row in range(int(top // self.cell_size), int(bottom // self.cell_size) + 1):
+                bucket = self.cells.get((column, row))
+                if bucket:
+                    found.extend(bucket)
+        found.sort(key=_insertion_order)
+        return [item for _, item in found]
+
+def _insertion_order(entry):
+    return entry[0]
+
+def benchmark(counts=(10, 100, 1000, 10000), queries=200, seed=0):
+    """Compare linear scans with grid queries as the number of bodies grows"""
+    from PinPhysics import Ball, Pin
+
+    rng = random.Random(seed)
+    print(f"{'bodies':>7} {'ball scan':>11} {'ball grid':>11} {'pins scan':>11} {'pins grid':>11}  (us per query)")
+    for count in counts:
+        # Keep the density of a real rack: about one pin per 40x40 px
+        side = 40 * count ** 0.5
+        pins = [Pin(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(count)]
+        balls = [Ball(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(queries)]
+        grid = SpatialHash(Ball(0, 0).radius + pins[0].radius)
+        for pin in pins:
+            grid.insert(pin, pin.x, pin.y)
+
+        start = time.perf_counter()
+        for ball in balls:
+            [pin for pin in pins if pin.check_collision(ball)]
+        ball_scan = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        for ball in balls:
+            [pin for pin in grid.query(ball.x, ball.y) if pin.check_collision(ball)]
+        ball_grid = (time.perf_counter() - start) / queries
+
+        # Pin-pin: each query looks for pins touching one pin
+        reach = 2 * pins[0].radius
+        probes = pins[:queries]
+        start = time.perf_counter()
+        for probe in probes:
+            [pin for pin in pins if pin is not probe and
+             (pin.x - probe.x) ** 2 + (pin.y - probe.y) ** 2 < reach * reach]
+        pins_scan = (time.perf_counter() - start) / len(probes)
+
+        start = time.perf_counter()
+        for probe in probes:
+            [pin for pin in grid.query(probe.x, probe.y) if pin is not probe and
+             (pin.x - probe.x) ** 2 + (pin.y - probe.y) ** 2 < reach * reach]
+        pins_grid = (time.perf_counter() - start) / len(probes)
+
+        print(f"{count:>7} {ball_scan * 1e6:>11.1f} {ball_grid * 1e6:>11.1f} "
+              f"{pins_scan * 1e6:>11.1f} {pins_grid * 1e6:>11.1f}")
+
+if __name__ == "__main__":
+    benchmark(tuple(int(count) for count in sys.argv[1:]) or (10, 100, 1000, 10000))
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from functools import lru_cache
+
+import pygame
+
+def init_display():
+    """Start only the pygame subsystems the games use, on first call
+
+    pygame.init() would also bring up audio, joysticks and the rest, which
+    none of the games need.
+    """
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+@lru_cache(maxsize=None)
+def font(size):
+    """pygame's default font at size, loaded once
+
+    This is the font SysFont(None, size) returns, without SysFont's scan of
+    every installed font on its first call.
+    """
+    init_display()
+    return pygame.font.Font(None, size)
+
+# Each entry point's module and what it takes to reach its first score or frame
+STARTUP_SCRIPTS = {
+    "BowlingGame.py (first score)": ("BowlingGame", """
+game = BowlingGame.BowlingGame()
+game.throw_ball()
+game.score_keeper.running_totals()
+"""),
+    "BowlingGameVisual.py (first frame)": ("BowlingGameVisual", """
+game = BowlingGameVisual.BowlingGame()
+game.renderer.render(game.scene_items())
+"""),
+    "SimplePinGame.py (first frame)": ("SimplePinGame", """
+game = SimplePinGame.PinGame()
+game.renderer.render(game.scene_items())
+"""),
+}
+
+TIMER = """
+import sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{script}
+ready = time.perf_counter()
+print((imported - start) * 1000, (ready - start) * 1000, "pygame" in sys.modules)
+"""
+
+def benchmark(runs=5):
+    """Median time from import to first frame or score for each entry point, in fresh interpreters"""
+    environment = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    environment.setdefault("SDL_VIDEODRIVER", "dummy")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'entry point':>36} {'import':>8} {'ready':>8}  pygame imported  (median ms)")
+    for label, (module, script) in STARTUP_SCRIPTS.items():
+        timings = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", TIMER.format(module=module, script=script)],
+                                    cwd=directory, env=environment, capture_output=True, text=True,
+                                    check=True).stdout
+            import_time, ready_time, uses_pygame = output.split()
+            timings.append((float(ready_time), float(import_time)))
+        ready_time, import_time = sorted(timings)[len(timings) // 2]
+        print(f"{label:>36} {import_time:>8.1f} {ready_time:>8.1f}  {'yes' if uses_pygame == 'True' else 'no'}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import pygame
+
+class SurfaceCache:
+    """LRU cache of pre-rendered surfaces: text, sprites and overlays
+
+    Everything is keyed on what it looks like, so once a scene has been drawn
+    once its text and sprites are plain blits. hits and misses count lookups.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def get(self, key, render, *args):
+        """Return the surface for key, calling render(*args) to make it on a miss"""
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self._surfaces[key] = render(*args)
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def text(self, font, text, color):
+        return self.get(("text", id(font), text, color), font.render, text, True, color)
+
+    def circle(self, radius, color, width=0):
+        """Circle sprite; blit it at (x - radius, y - radius) to centre it on (x, y)"""
+        return self.get(("circle", radius, color, width), _render_circle, radius, color, width)
+
+    def overlay(self, size, color):
+        """Full-size translucent fill, for darkening the screen"""
+        return self.get(("overlay", size, color), _render_overlay, size, color)
+
+    def clear(self):
+        self._surfaces.clear()
+
+def _render_circle(radius, color, width):
+    surface = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (radius, radius), radius, width)
+    return surface
+
+def _render_overlay(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface
+
+def benchmark(frames=600):
+    """Time full redraws of the visual game with a cold and a warm cache"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import BowlingGameVisual
+
+    game = BowlingGameVisual.BowlingGame()
+    game.scores = list(range(10, 110, 10))
+    game.game_over = True
+    cache = BowlingGameVisual.surfaces
+    for label in ("cold", "warm"):
+        cache.clear()
+        if label == "warm":
+            game.renderer.invalidate()
+            game.renderer.render(game.scene_items())
+        cache.hits = cache.misses = 0
+        start = time.perf_counter()
+        for _ in range(frames):
+            game.renderer.invalidate()
+            game.renderer.render(game.scene_items())
+            if label == "cold":
+                cache.clear()
+        elapsed = (time.perf_counter() - start) / frames * 1000
+        print(f"{label}: {elapsed:.3f} ms per full frame, {cache.hits} hits, {cache.misses} misses")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 600)